@@ -0,0 +1,270 @@
+"""
+Analytics Trends Module
+Pre-aggregated daily risk/origin counters behind /admin/analytics/trends
+
+Each analytics_daily document holds two sets of counters:
+- backfill: totals for reports timestamped before a fixed cutoff, written
+  with $set by backfill_daily_trends so a re-run replaces rather than adds
+- live: $inc counters for reports timestamped at or after the cutoff,
+  maintained by record_daily_trend as reports are saved
+The cutoff is fixed once in analytics_meta, so every report lands in
+exactly one of the two.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Trend buckets, built once instead of per analysed row
+_RISK_BUCKETS = {"high": "high_risk", "medium": "medium_risk", "low": "low_risk"}
+
+_TREND_COLUMNS = [
+    "total", "high_risk", "medium_risk", "low_risk",
+    "ai_generated", "original", "unclear"
+]
+
+# Report fields _aggregate_daily_trends reads
+_TREND_PROJECTION = {
+    "_id": 0,
+    "timestamp": 1,
+    "scam_assessment.risk_level": 1,
+    "origin_verdict.classification": 1
+}
+
+_META_ID = "daily_trends"
+
+# A claim older than this is assumed to belong to a worker that died mid-backfill
+BACKFILL_STALE_AFTER = timedelta(minutes=10)
+
+# Cached once read: the cutoff never changes after it is first stored
+_cutoff: Optional[datetime] = None
+
+
+def _origin_bucket(classification: str) -> str:
+    """Map an origin verdict classification to its trend bucket ("ai" checked first)"""
+    classification = classification.lower()
+    if "ai" in classification:
+        return "ai_generated"
+    if "original" in classification:
+        return "original"
+    return "unclear"
+
+
+def _as_utc(timestamp) -> datetime:
+    """Return timestamp as an aware UTC datetime (accepts ISO strings and naive BSON dates)"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def _aggregate_daily_trends(
+    analyses: list,
+    before: Optional[datetime] = None,
+    since: Optional[datetime] = None
+) -> list:
+    """
+    Group analyses into per-day risk/origin counts
+
+    Vectorised with pandas so the counting runs as column operations
+    rather than a Python loop per analysis.
+
+    Args:
+        analyses: Report projections with timestamp, risk level and classification
+        before: Only count reports timestamped before this (UTC)
+        since: Only count reports timestamped at or after this (UTC)
+
+    Returns:
+        Daily trend dicts sorted by date
+    """
+    import pandas as pd
+
+    if not analyses:
+        return []
+
+    df = pd.json_normalize(analyses).reindex(
+        columns=["timestamp", "scam_assessment.risk_level", "origin_verdict.classification"]
+    )
+
+    # Timestamps are BSON dates (legacy rows may still hold ISO strings); drop rows that don't parse
+    ts = pd.to_datetime(df["timestamp"], utc=True, errors="coerce", format="ISO8601")
+    valid = ts.notna()
+    if not valid.all():
+        logger.warning(f"Skipped {int((~valid).sum())} analyses with unparseable timestamps")
+    if before is not None:
+        valid &= ts < pd.Timestamp(before)
+    if since is not None:
+        valid &= ts >= pd.Timestamp(since)
+    if not valid.any():
+        return []
+    df, day = df[valid], ts[valid].dt.strftime("%Y-%m-%d").rename("date")
+
+    risk = df["scam_assessment.risk_level"].fillna("").astype(str).str.lower().map(_RISK_BUCKETS)
+
+    # Verdicts come from a handful of fixed strings: classify each distinct one once
+    classification = df["origin_verdict.classification"].fillna("").astype(str)
+    origin = classification.map({c: _origin_bucket(c) for c in classification.unique()})
+
+    counts = pd.concat(
+        [day.value_counts().rename("total"), pd.crosstab(day, risk), pd.crosstab(day, origin)],
+        axis=1
+    )
+    counts = counts.reindex(columns=_TREND_COLUMNS).fillna(0).astype(int).sort_index()
+    counts.index.name = "date"
+
+    return counts.reset_index().to_dict("records")
+
+
+async def _trend_cutoff(db) -> datetime:
+    """
+    Return the backfill/live cutoff, fixing it on first use
+
+    Whichever of the backfill or a live write gets here first stores the
+    current time; $setOnInsert keeps every later caller on that value.
+    """
+    global _cutoff
+    if _cutoff is None:
+        await db.analytics_meta.update_one(
+            {"_id": _META_ID},
+            {"$setOnInsert": {"cutoff": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        meta = await db.analytics_meta.find_one({"_id": _META_ID})
+        _cutoff = _as_utc(meta["cutoff"])
+    return _cutoff
+
+
+async def record_daily_trend(db, report: Dict[str, Any]) -> None:
+    """
+    Increment the live daily trend counters for a new report
+
+    Keeps /admin/analytics/trends a range read over analytics_daily
+    instead of a scan of analysis_reports. Reports timestamped before the
+    cutoff are left to backfill_daily_trends.
+
+    Args:
+        db: Database handle
+        report: Analysis report as stored/returned (timestamp may be str or datetime)
+    """
+    try:
+        timestamp = _as_utc(report.get("timestamp"))
+        if timestamp < await _trend_cutoff(db):
+            return
+        date_key = timestamp.strftime("%Y-%m-%d")
+
+        increments = {"live.total": 1}
+        risk_bucket = _RISK_BUCKETS.get(report.get("scam_assessment", {}).get("risk_level", "").lower())
+        if risk_bucket:
+            increments[f"live.{risk_bucket}"] = 1
+        increments[f"live.{_origin_bucket(report.get('origin_verdict', {}).get('classification', ''))}"] = 1
+
+        await db.analytics_daily.update_one(
+            {"_id": date_key},
+            {"$inc": increments, "$setOnInsert": {"date": date_key}},
+            upsert=True
+        )
+    except Exception as e:
+        # Don't fail the analysis if analytics bookkeeping fails
+        logger.warning(f"Daily trend update failed: {str(e)}")
+
+
+async def backfill_daily_trends(db) -> int:
+    """
+    Write the backfill counters for every report before the cutoff
+
+    One worker claims the run in analytics_meta; a claim that is never
+    completed (the worker crashed) can be taken over once it is older than
+    BACKFILL_STALE_AFTER. Per-day totals are written with $set, so a run
+    that is retried after a partial write ends with the same counts.
+
+    Returns:
+        Number of daily documents written
+    """
+    cutoff = await _trend_cutoff(db)
+    now = datetime.now(timezone.utc)
+    claim = await db.analytics_meta.find_one_and_update(
+        {
+            "_id": _META_ID,
+            "completed_at": {"$exists": False},
+            "$or": [
+                {"claimed_at": {"$exists": False}},
+                {"claimed_at": {"$lt": now - BACKFILL_STALE_AFTER}}
+            ]
+        },
+        {"$set": {"claimed_at": now}}
+    )
+    if claim is None:
+        return 0
+
+    # Legacy rows may hold ISO string timestamps, which $lt can't compare to a date
+    cursor = db.analysis_reports.find(
+        {"$or": [{"timestamp": {"$lt": cutoff}}, {"timestamp": {"$type": "string"}}]},
+        _TREND_PROJECTION
+    )
+    trends = _aggregate_daily_trends(await cursor.to_list(length=None), before=cutoff)
+    for day in trends:
+        await db.analytics_daily.update_one(
+            {"_id": day["date"]},
+            {
+                "$set": {"date": day["date"], "backfill": {c: day[c] for c in _TREND_COLUMNS}},
+                # Top-level counters from before the backfill/live split
+                "$unset": {c: "" for c in _TREND_COLUMNS}
+            },
+            upsert=True
+        )
+
+    await db.analytics_meta.update_one(
+        {"_id": _META_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc)}}
+    )
+    return len(trends)
+
+
+async def remove_daily_trends(db, query: Dict[str, Any]) -> None:
+    """
+    Subtract the reports matching query from analytics_daily
+
+    Called before those reports are deleted (GDPR erasure and retention),
+    so the trend counters keep matching analysis_reports.
+
+    Args:
+        db: Database handle
+        query: analysis_reports filter about to be passed to delete_many
+    """
+    try:
+        cutoff = await _trend_cutoff(db)
+        cursor = db.analysis_reports.find(query, _TREND_PROJECTION)
+        analyses = await cursor.to_list(length=None)
+        for prefix, trends in (
+            ("backfill", _aggregate_daily_trends(analyses, before=cutoff)),
+            ("live", _aggregate_daily_trends(analyses, since=cutoff))
+        ):
+            for day in trends:
+                decrements = {f"{prefix}.{c}": -day[c] for c in _TREND_COLUMNS if day[c]}
+                await db.analytics_daily.update_one({"_id": day["date"]}, {"$inc": decrements})
+    except Exception as e:
+        # Don't block the deletion if analytics bookkeeping fails
+        logger.warning(f"Daily trend decrement failed: {str(e)}")
+
+
+async def read_daily_trends(db, start_day: str) -> List[Dict[str, Any]]:
+    """
+    Read per-day trend counts from start_day (YYYY-MM-DD) onwards
+
+    Returns:
+        Daily trend dicts sorted by date, backfill and live counts summed
+    """
+    daily_docs = await db.analytics_daily.find(
+        {"_id": {"$gte": start_day}}
+    ).sort("_id", 1).to_list(length=None)
+
+    trends = []
+    for doc in daily_docs:
+        backfill, live = doc.get("backfill", {}), doc.get("live", {})
+        trends.append({
+            "date": doc["_id"],
+            **{c: backfill.get(c, 0) + live.get(c, 0) for c in _TREND_COLUMNS}
+        })
+    return trends
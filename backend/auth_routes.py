@@ -8,6 +8,7 @@ from typing import Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import logging
+import asyncio
 
 from models import (
     UserRegistration, UserLogin, TokenResponse, RefreshTokenRequest,
@@ -15,9 +16,10 @@ from models import (
     AuditLogEntry, ConsentRecord, DataExportRequest
 )
 from auth_jwt import JWTManager, get_current_user, get_optional_user, require_role
-from password_utils import hash_password, verify_password, validate_password_strength
+from password_utils import hash_password, verify_password, password_needs_rehash, validate_password_strength
 from audit_logger import AuditLogger
 from gdpr_compliance import GDPRManager
+from analytics_trends import read_daily_trends
 
 logger = logging.getLogger(__name__)
 
@@ -202,6 +204,16 @@ async def login_user(
                 detail="Invalid email or password"
             )
         
+        # Upgrade legacy bcrypt (or outdated Argon2) hashes while we have the plaintext
+        if password_needs_rehash(user["password_hash"]):
+            try:
+                await db.users.update_one(
+                    {"user_id": user["user_id"]},
+                    {"$set": {"password_hash": hash_password(credentials.password)}}
+                )
+            except Exception as e:
+                logger.warning(f"Password rehash failed: {str(e)}")
+        
         # Check if account is disabled
         if user.get("disabled", False):
             await audit_logger.log_request(
@@ -787,6 +799,38 @@ async def cleanup_old_data(
 
 # ============== ANALYTICS DASHBOARD ENDPOINTS (Phase 4) ==============
 
+def _count_top(values, exclude: str, limit: int) -> tuple:
+    """
+    Count string occurrences and return the most common ones
+    
+    Strings are interned to small integer codes once and counted with a
+    single np.bincount pass; ties keep first-seen order like Counter.most_common.
+    
+    Args:
+        values: Iterable of strings to count
+        exclude: Placeholder value to leave out of the counts
+        limit: Number of top entries to return
+        
+    Returns:
+        (number of unique values, [(value, count), ...])
+    """
+    import numpy as np
+    
+    codes_by_value = {}
+    codes = np.fromiter(
+        (codes_by_value.setdefault(v, len(codes_by_value)) for v in values if v != exclude),
+        dtype=np.int64
+    )
+    if not codes_by_value:
+        return 0, []
+    
+    counts = np.bincount(codes, minlength=len(codes_by_value))
+    values_by_code = list(codes_by_value)
+    top = np.argsort(-counts, kind="stable")[:limit]
+    
+    return len(values_by_code), [(values_by_code[i], int(counts[i])) for i in top]
+
+
 @admin_router.get("/analytics/overview")
 async def get_analytics_overview(
     user: Dict = Depends(require_role(UserRole.ADMIN)),
@@ -804,6 +848,7 @@ async def get_analytics_overview(
     """
     try:
         from datetime import timedelta, timezone
+        from server import report_from_storage
         
         now = datetime.now(timezone.utc)
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -820,25 +865,25 @@ async def get_analytics_overview(
         
         # Today's metrics
         today_analyses = await db.analysis_reports.count_documents({
-            "timestamp": {"$gte": today_start.isoformat()}
+            "timestamp": {"$gte": today_start}
         })
         
         # Yesterday's metrics for comparison
         yesterday_analyses = await db.analysis_reports.count_documents({
             "timestamp": {
-                "$gte": yesterday_start.isoformat(),
-                "$lt": today_start.isoformat()
+                "$gte": yesterday_start,
+                "$lt": today_start
             }
         })
         
         # Weekly metrics
         week_analyses = await db.analysis_reports.count_documents({
-            "timestamp": {"$gte": week_start.isoformat()}
+            "timestamp": {"$gte": week_start}
         })
         
         # Monthly metrics
         month_analyses = await db.analysis_reports.count_documents({
-            "timestamp": {"$gte": month_start.isoformat()}
+            "timestamp": {"$gte": month_start}
         })
         
         # Growth calculations
@@ -862,6 +907,7 @@ async def get_analytics_overview(
             {},
             {"_id": 0, "report_id": 1, "timestamp": 1, "scam_assessment.risk_level": 1, "origin_verdict.classification": 1}
         ).sort("timestamp", -1).limit(10).to_list(length=10)
+        recent_analyses = [report_from_storage(a) for a in recent_analyses]
         
         return {
             "overview": {
@@ -915,68 +961,12 @@ async def get_analytics_trends(
     """
     try:
         from datetime import timedelta, timezone
-        from collections import defaultdict
         
         now = datetime.now(timezone.utc)
         start_date = now - timedelta(days=days)
         
-        # Get all analyses in the time range
-        cursor = db.analysis_reports.find(
-            {"timestamp": {"$gte": start_date.isoformat()}},
-            {
-                "_id": 0,
-                "timestamp": 1,
-                "scam_assessment.risk_level": 1,
-                "origin_verdict.classification": 1
-            }
-        )
-        analyses = await cursor.to_list(length=None)
-        
-        # Group by date
-        daily_data = defaultdict(lambda: {
-            "date": "",
-            "total": 0,
-            "high_risk": 0,
-            "medium_risk": 0,
-            "low_risk": 0,
-            "ai_generated": 0,
-            "original": 0,
-            "unclear": 0
-        })
-        
-        for analysis in analyses:
-            try:
-                # Parse timestamp
-                ts = datetime.fromisoformat(analysis["timestamp"].replace('Z', '+00:00'))
-                date_key = ts.strftime("%Y-%m-%d")
-                
-                # Update counts
-                daily_data[date_key]["date"] = date_key
-                daily_data[date_key]["total"] += 1
-                
-                # Risk levels
-                risk = analysis.get("scam_assessment", {}).get("risk_level", "").lower()
-                if risk == "high":
-                    daily_data[date_key]["high_risk"] += 1
-                elif risk == "medium":
-                    daily_data[date_key]["medium_risk"] += 1
-                elif risk == "low":
-                    daily_data[date_key]["low_risk"] += 1
-                
-                # Origin classification
-                classification = analysis.get("origin_verdict", {}).get("classification", "").lower()
-                if "ai" in classification:
-                    daily_data[date_key]["ai_generated"] += 1
-                elif "original" in classification:
-                    daily_data[date_key]["original"] += 1
-                else:
-                    daily_data[date_key]["unclear"] += 1
-            except Exception as parse_error:
-                logger.warning(f"Failed to parse analysis: {parse_error}")
-                continue
-        
-        # Convert to sorted list
-        trends = sorted(daily_data.values(), key=lambda x: x["date"])
+        # Pre-aggregated daily counters (one doc per day, maintained at write time)
+        trends = await read_daily_trends(db, start_date.strftime("%Y-%m-%d"))
         
         return {
             "period_days": days,
@@ -1007,8 +997,6 @@ async def get_scam_pattern_analytics(
     - Behavioral flag statistics
     """
     try:
-        from collections import Counter
-        
         # Get all analyses with scam patterns
         cursor = db.analysis_reports.find(
             {},
@@ -1020,40 +1008,33 @@ async def get_scam_pattern_analytics(
         )
         analyses = await cursor.to_list(length=None)
         
-        # Count patterns
-        all_patterns = []
-        all_flags = []
-        
-        for analysis in analyses:
-            patterns = analysis.get("scam_assessment", {}).get("scam_patterns", [])
-            flags = analysis.get("scam_assessment", {}).get("behavioral_flags", [])
-            
-            all_patterns.extend(patterns)
-            all_flags.extend(flags)
-        
-        # Get top patterns
-        pattern_counter = Counter(all_patterns)
-        flag_counter = Counter(all_flags)
+        assessments = [analysis.get("scam_assessment", {}) for analysis in analyses]
         
-        # Remove "No known scam patterns detected"
-        if "No known scam patterns detected" in pattern_counter:
-            del pattern_counter["No known scam patterns detected"]
-        if "No behavioral manipulation detected" in flag_counter:
-            del flag_counter["No behavioral manipulation detected"]
+        # Count patterns (ignoring the "nothing found" placeholders)
+        unique_patterns, pattern_counts = _count_top(
+            (p for a in assessments for p in a.get("scam_patterns", [])),
+            "No known scam patterns detected",
+            limit
+        )
+        unique_flags, flag_counts = _count_top(
+            (f for a in assessments for f in a.get("behavioral_flags", [])),
+            "No behavioral manipulation detected",
+            limit
+        )
         
         top_patterns = [
             {"pattern": pattern, "count": count}
-            for pattern, count in pattern_counter.most_common(limit)
+            for pattern, count in pattern_counts
         ]
         
         top_flags = [
             {"flag": flag, "count": count}
-            for flag, count in flag_counter.most_common(limit)
+            for flag, count in flag_counts
         ]
         
         return {
-            "total_unique_patterns": len(pattern_counter),
-            "total_unique_flags": len(flag_counter),
+            "total_unique_patterns": unique_patterns,
+            "total_unique_flags": unique_flags,
             "top_patterns": top_patterns,
             "top_behavioral_flags": top_flags
         }
@@ -1165,22 +1146,24 @@ async def get_performance_analytics(
         
         # Recent API activity
         recent_hour_analyses = await db.analysis_reports.count_documents({
-            "timestamp": {"$gte": hour_ago.isoformat()}
+            "timestamp": {"$gte": hour_ago}
         })
         recent_day_analyses = await db.analysis_reports.count_documents({
-            "timestamp": {"$gte": day_ago.isoformat()}
+            "timestamp": {"$gte": day_ago}
         })
         
-        # Database collection stats
-        total_reports = await db.analysis_reports.count_documents({})
-        total_audit_logs = await db.audit_logs.count_documents({})
+        # Database collection stats (unfiltered, so collection metadata is enough)
+        total_reports = await db.analysis_reports.estimated_document_count()
+        total_audit_logs = await db.audit_logs.estimated_document_count()
         
         # Async job statistics (if available)
+        # Broker RPC runs off the event loop with a short timeout so a slow/missing broker can't stall us
         pending_jobs = 0
         try:
             from server import celery_app
-            inspect = celery_app.control.inspect()
-            active = inspect.active()
+            active = await asyncio.to_thread(
+                lambda: celery_app.control.inspect(timeout=0.5).active()
+            )
             pending_jobs = sum(len(tasks) for tasks in (active or {}).values())
         except Exception:
             pass
@@ -2,28 +2,48 @@
 Redis Cache Manager
 Handles caching of analysis results to avoid duplicate processing
 """
-import redis
 import hashlib
 import json
 import logging
+import orjson
+import zstandard as zstd
 from typing import Optional, Dict, Any
 
+from config import get_redis
+
 logger = logging.getLogger(__name__)
 
+# Cached values are stored as MAGIC + zstd(orjson(report)); entries without the
+# prefix are legacy plain-JSON values and are still readable
+CACHE_FORMAT_ZSTD = b'\x01'
+_compressor = zstd.ZstdCompressor(level=3)
+_decompressor = zstd.ZstdDecompressor()
+
+
+def encode_cache_value(value: Dict[str, Any]) -> bytes:
+    """Serialize and compress a value for Redis"""
+    return CACHE_FORMAT_ZSTD + _compressor.compress(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+
+
+def decode_cache_value(raw: bytes) -> Dict[str, Any]:
+    """Decode a Redis value written by encode_cache_value (or a legacy JSON value)"""
+    if raw[:1] == CACHE_FORMAT_ZSTD:
+        return orjson.loads(_decompressor.decompress(raw[1:]))
+    return json.loads(raw)
+
 
 class CacheManager:
     """Manages Redis caching for content analysis"""
     
-    def __init__(self, redis_url: str = "redis://localhost:6379", ttl: int = 86400):
+    def __init__(self, ttl: int = 86400):
         """
-        Initialize cache manager
+        Initialize cache manager on the shared pool from config.get_redis()
         
         Args:
-            redis_url: Redis connection URL
             ttl: Time to live for cache entries in seconds (default: 24 hours)
         """
         try:
-            self.redis_client = redis.from_url(redis_url, decode_responses=True)
+            self.redis_client = get_redis()
             self.ttl = ttl
             self.redis_client.ping()
             logger.info(f"✅ Redis cache connected successfully")
@@ -46,7 +66,7 @@ class CacheManager:
             
             if cached_data:
                 logger.info(f"✅ Cache HIT for content hash: {content_hash[:16]}...")
-                return json.loads(cached_data)
+                return decode_cache_value(cached_data)
             else:
                 logger.info(f"❌ Cache MISS for content hash: {content_hash[:16]}...")
                 return None
@@ -64,7 +84,7 @@ class CacheManager:
             self.redis_client.setex(
                 cache_key,
                 self.ttl,
-                json.dumps(analysis_result)
+                encode_cache_value(analysis_result)
             )
             logger.info(f"✅ Cached analysis for: {content_hash[:16]}... (TTL: {self.ttl}s)")
             return True
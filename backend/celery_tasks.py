@@ -2,7 +2,8 @@
 Celery Tasks for Async Processing
 Handles heavy video/audio processing in background
 """
-from celery import Celery
+from celery import Celery, chord, group
+from celery.signals import worker_process_init
 import os
 import logging
 from typing import Dict, Any
@@ -26,12 +27,45 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=600,  # 10 minutes max
     task_soft_time_limit=540,  # 9 minutes soft limit
+    # Fair scheduling for long media jobs: each worker reserves one task at a
+    # time and only acks it once finished, so a crashed worker's job is redelivered
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_max_tasks_per_child=50,
+    # Heavy video/audio jobs go to a dedicated queue so they don't starve batch work
+    task_routes={
+        'process_video_analysis': {'queue': 'media'},
+        'process_audio_analysis': {'queue': 'media'},
+    },
 )
 
 logger.info("✅ Celery initialized for async processing")
 
+# Forensic analyzer shared by all tasks in a worker process
+_ANALYZER = None
 
-@celery_app.task(name='process_video_analysis', bind=True)
+
+def _analyzer():
+    """Return the per-process ForensicAnalyzer, creating it on first use"""
+    global _ANALYZER
+    if _ANALYZER is None:
+        # Import here to avoid circular imports
+        from forensics import ForensicAnalyzer
+        _ANALYZER = ForensicAnalyzer()
+    return _ANALYZER
+
+
+@worker_process_init.connect
+def _warm_analyzer(**kwargs):
+    """Build the analyzer once per worker process at fork time"""
+    try:
+        _analyzer()
+    except Exception as e:
+        logger.warning(f"Forensic analyzer warm-up failed: {str(e)}")
+
+
+@celery_app.task(name='process_video_analysis', bind=True, queue='media')
 def process_video_analysis(self, video_bytes: bytes, filename: str) -> Dict[str, Any]:
     """
     Process COMPLETE video analysis asynchronously
@@ -52,15 +86,14 @@ def process_video_analysis(self, video_bytes: bytes, filename: str) -> Dict[str,
     
     try:
         # Import here to avoid circular imports
-        from forensics import ForensicAnalyzer, fuse_evidence
+        from forensics import fuse_evidence
         import uuid
         
         # Update progress
         self.update_state(state='PROGRESS', meta={'progress': 10})
         
         # Step 1: Forensic analysis
-        analyzer = ForensicAnalyzer()
-        forensic_result = analyzer.analyze_video(video_bytes, filename)
+        forensic_result = _analyzer().analyze_video(video_bytes, filename)
         logger.info(f"✅ Forensics complete: {filename}")
         
         self.update_state(state='PROGRESS', meta={'progress': 40})
@@ -152,7 +185,7 @@ def process_video_analysis(self, video_bytes: bytes, filename: str) -> Dict[str,
         raise
 
 
-@celery_app.task(name='process_audio_analysis', bind=True)
+@celery_app.task(name='process_audio_analysis', bind=True, queue='media')
 def process_audio_analysis(self, audio_bytes: bytes, filename: str) -> Dict[str, Any]:
     """
     Process COMPLETE audio analysis asynchronously
@@ -173,15 +206,14 @@ def process_audio_analysis(self, audio_bytes: bytes, filename: str) -> Dict[str,
     
     try:
         # Import here to avoid circular imports
-        from forensics import ForensicAnalyzer, fuse_evidence
+        from forensics import fuse_evidence
         import uuid
         
         # Update progress
         self.update_state(state='PROGRESS', meta={'progress': 10})
         
         # Step 1: Forensic analysis
-        analyzer = ForensicAnalyzer()
-        forensic_result = analyzer.analyze_audio(audio_bytes, filename)
+        forensic_result = _analyzer().analyze_audio(audio_bytes, filename)
         logger.info(f"✅ Forensics complete: {filename}")
         
         self.update_state(state='PROGRESS', meta={'progress': 40})
@@ -272,11 +304,46 @@ def process_audio_analysis(self, audio_bytes: bytes, filename: str) -> Dict[str,
         raise
 
 
-@celery_app.task(name='process_batch_analysis')
-def process_batch_analysis(batch_items: list) -> Dict[str, Any]:
+@celery_app.task(name='analyze_batch_item')
+def analyze_batch_item(item: Any) -> Dict[str, Any]:
+    """
+    Analyze a single batch item (fanned out by process_batch_analysis)
+    
+    Args:
+        item: Item to analyze
+        
+    Returns:
+        Per-item result dict
+    """
+    try:
+        # This would call the main analysis function
+        return {
+            'status': 'success',
+            'item': item
+        }
+    except Exception as e:
+        return {
+            'status': 'error',
+            'item': item,
+            'error': str(e)
+        }
+
+
+@celery_app.task(name='collect_batch_results')
+def collect_batch_results(results: list) -> Dict[str, Any]:
+    """Reduce per-item results into the batch response"""
+    logger.info(f"✅ Batch analysis complete: {len(results)} results")
+    return {'results': results}
+
+
+@celery_app.task(name='process_batch_analysis', bind=True)
+def process_batch_analysis(self, batch_items: list) -> Dict[str, Any]:
     """
     Process batch analysis asynchronously
     
+    Items are fanned out across workers as a chord; this task is replaced
+    by the chord so its result is the collected batch response.
+    
     Args:
         batch_items: List of items to analyze
         
@@ -285,21 +352,8 @@ def process_batch_analysis(batch_items: list) -> Dict[str, Any]:
     """
     logger.info(f"📦 Starting batch analysis: {len(batch_items)} items")
     
-    results = []
-    for item in batch_items:
-        try:
-            # Process each item
-            # This would call the main analysis function
-            results.append({
-                'status': 'success',
-                'item': item
-            })
-        except Exception as e:
-            results.append({
-                'status': 'error',
-                'item': item,
-                'error': str(e)
-            })
+    if not batch_items:
+        return {'results': []}
     
-    logger.info(f"✅ Batch analysis complete: {len(results)} results")
-    return {'results': results}
+    header = group(analyze_batch_item.s(item) for item in batch_items)
+    raise self.replace(chord(header, collect_batch_results.s()))
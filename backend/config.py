@@ -3,8 +3,10 @@ Centralized Configuration for VeriSure Platform
 Phase 1 Critical Fix: Configuration Management
 """
 import os
-from typing import Dict, List
-from enum import Enum
+from functools import cache
+from types import MappingProxyType
+from typing import Callable, Dict, Final, List, Mapping, Union
+from enum import Enum, StrEnum
 
 
 class Environment(str, Enum):
@@ -17,7 +19,10 @@ class Environment(str, Enum):
 # ============================================================================
 # ENVIRONMENT
 # ============================================================================
-ENV = os.getenv("ENVIRONMENT", "development")
+# Snapshot of the process environment; every setting below is read from it once
+_ENV: Final[Dict[str, str]] = os.environ.copy()
+
+ENV = _ENV.get("ENVIRONMENT", "development")
 
 
 # ============================================================================
@@ -37,7 +42,7 @@ MAX_TEXT_LENGTH = 100 * 1024  # 100KB (prevents memory exhaustion)
 MAX_BATCH_SIZE = 10  # Max files in batch processing
 
 # Allowed MIME types
-ALLOWED_IMAGE_TYPES = [
+ALLOWED_IMAGE_TYPES = frozenset({
     'image/jpeg',
     'image/jpg', 
     'image/png',
@@ -45,26 +50,36 @@ ALLOWED_IMAGE_TYPES = [
     'image/webp',
     'image/bmp',
     'image/tiff'
-]
+})
 
-ALLOWED_VIDEO_TYPES = [
+ALLOWED_VIDEO_TYPES = frozenset({
     'video/mp4',
     'video/mpeg',
     'video/quicktime',
     'video/x-msvideo',
     'video/x-matroska'
-]
+})
 
-ALLOWED_AUDIO_TYPES = [
+ALLOWED_AUDIO_TYPES = frozenset({
     'audio/mpeg',
     'audio/mp3',
     'audio/wav',
     'audio/ogg',
     'audio/aac',
     'audio/m4a'
-]
+})
+
+_NO_ALLOWED_TYPES: Final[frozenset] = frozenset()
+
+# Allowed MIME types per content type
+_ALLOWED_TYPES_BY_CONTENT: Final[Dict[str, frozenset]] = {
+    'image': ALLOWED_IMAGE_TYPES,
+    'video': ALLOWED_VIDEO_TYPES,
+    'audio': ALLOWED_AUDIO_TYPES,
+}
 
 # Magic bytes for file type validation
+MAGIC_BYTES_HEADER_SIZE = 32  # Longest signature is 12 bytes; nothing past this is inspected
 MAGIC_BYTES_SIGNATURES: Dict[str, List[bytes]] = {
     'jpeg': [b'\xFF\xD8\xFF'],
     'png': [b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A'],
@@ -76,6 +91,31 @@ MAGIC_BYTES_SIGNATURES: Dict[str, List[bytes]] = {
 }
 
 
+MagicMatcher = Callable[[Union[bytes, memoryview]], bool]
+
+
+def _build_magic_matcher(file_type: str, signatures: List[bytes]) -> MagicMatcher:
+    """
+    Generate a matcher specialized to one file type's signatures
+    
+    Each signature becomes an inline slice comparison against a constant, so
+    a check runs no loop and builds no lookup table at call time.
+    """
+    lines = [f"def match_{file_type}(data):"]
+    for signature in signatures:
+        lines.append(f"    if data[:{len(signature)}] == {signature!r}: return True")
+    lines.append("    return False")
+    namespace: Dict[str, MagicMatcher] = {}
+    exec("\n".join(lines), namespace)
+    return namespace[f"match_{file_type}"]
+
+
+_MAGIC_MATCHERS: Final[Dict[str, MagicMatcher]] = {
+    file_type: _build_magic_matcher(file_type, signatures)
+    for file_type, signatures in MAGIC_BYTES_SIGNATURES.items()
+}
+
+
 # ============================================================================
 # PRICING & UNIT ECONOMICS (Phase 1 Critical Fix - FIXED)
 # ============================================================================
@@ -86,37 +126,47 @@ MAGIC_BYTES_SIGNATURES: Dict[str, List[bytes]] = {
 # Result: LOSING MONEY ❌
 
 # NEW PRICING (PROFITABLE):
-class PricingTier(str, Enum):
+class PricingTier(StrEnum):
     FREE = "free"
     PREMIUM = "premium"
     ENTERPRISE = "enterprise"
 
 
 # Tier limits per day
-TIER_LIMITS = {
+TIER_LIMITS: Final[Mapping[PricingTier, int]] = MappingProxyType({
     PricingTier.FREE: 50,  # Reduced from 100 to reduce abuse
     PricingTier.PREMIUM: 1000,  # 1,000 analyses/day
     PricingTier.ENTERPRISE: 999999  # Unlimited (capped for safety)
-}
+})
 
 # Pricing (INR per month)
-TIER_PRICING = {
+TIER_PRICING: Final[Mapping[PricingTier, int]] = MappingProxyType({
     PricingTier.FREE: 0,
     PricingTier.PREMIUM: 299,  # FIXED: ₹99 → ₹299 (now profitable)
     PricingTier.ENTERPRISE: 14999  # FIXED: ₹9,999 → ₹14,999 (usage-based)
-}
+})
 
 # Cost per analysis (estimated)
-COST_PER_ANALYSIS = {
+COST_PER_ANALYSIS: Final[Mapping[str, float]] = MappingProxyType({
     'text': 0.5,  # ₹0.50
     'image': 2.0,  # ₹2.00
     'video': 5.0,  # ₹5.00
     'audio': 3.0   # ₹3.00
-}
+})
+
+
+# Break-even calculations (computed on first use)
+@cache
+def premium_break_even() -> float:
+    """Premium analyses per month covered by the subscription price (~150)"""
+    return TIER_PRICING[PricingTier.PREMIUM] / COST_PER_ANALYSIS['image']
+
 
-# Break-even calculations
-PREMIUM_BREAK_EVEN = TIER_PRICING[PricingTier.PREMIUM] / COST_PER_ANALYSIS['image']  # ~150 analyses
-PROFIT_MARGIN = (TIER_PRICING[PricingTier.PREMIUM] - (1000 * COST_PER_ANALYSIS['image'])) / TIER_PRICING[PricingTier.PREMIUM]  # ~85% margin
+@cache
+def profit_margin() -> float:
+    """Premium margin at the daily analysis limit"""
+    premium_price = TIER_PRICING[PricingTier.PREMIUM]
+    return (premium_price - (TIER_LIMITS[PricingTier.PREMIUM] * COST_PER_ANALYSIS['image'])) / premium_price
 
 
 # ============================================================================
@@ -134,15 +184,41 @@ RATE_LIMITS = {
 # ============================================================================
 # CACHING
 # ============================================================================
-CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL', 7 * 24 * 3600))  # 7 days
-REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+CACHE_TTL_SECONDS = int(_ENV.get('CACHE_TTL', 7 * 24 * 3600))  # 7 days
+REDIS_URL = _ENV.get('REDIS_URL', 'redis://localhost:6379')
+
+# Connection pooling settings (mirrors MONGO_MAX_POOL_SIZE)
+REDIS_MAX_CONNECTIONS = 50
+
+
+@cache
+def _redis_pool():
+    """Connection pool shared by every client from get_redis()"""
+    import redis
+    return redis.ConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        decode_responses=False,
+        socket_keepalive=True
+    )
+
+
+def get_redis():
+    """
+    Redis client backed by the shared connection pool
+    
+    Clients are cheap; sockets are reused across calls. Batch several
+    commands with client.pipeline() instead of issuing them one by one.
+    """
+    import redis
+    return redis.Redis(connection_pool=_redis_pool())
 
 
 # ============================================================================
 # DATABASE
 # ============================================================================
-MONGO_URL = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
-DB_NAME = os.getenv('DB_NAME', 'verisure')
+MONGO_URL = _ENV.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = _ENV.get('DB_NAME', 'verisure')
 
 # Connection pooling settings
 MONGO_MAX_POOL_SIZE = 50
@@ -154,14 +230,14 @@ MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
 # ============================================================================
 # CELERY (Async Processing)
 # ============================================================================
-CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = _ENV.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = _ENV.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
 
 # ============================================================================
 # AI/ML MODELS
 # ============================================================================
-EMERGENT_LLM_KEY = os.getenv('EMERGENT_LLM_KEY', '')
+EMERGENT_LLM_KEY = _ENV.get('EMERGENT_LLM_KEY', '')
 CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
 
 
@@ -176,7 +252,7 @@ PROMETHEUS_PORT = 9090
 # ============================================================================
 # SECURITY
 # ============================================================================
-JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'change-this-in-production')
+JWT_SECRET_KEY = _ENV.get('JWT_SECRET_KEY', 'change-this-in-production')
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
@@ -188,14 +264,17 @@ PASSWORD_REQUIRE_LOWERCASE = True
 PASSWORD_REQUIRE_DIGIT = True
 PASSWORD_REQUIRE_SPECIAL = False
 
-# Bcrypt rounds
-BCRYPT_ROUNDS = 12
+# Argon2id password hashing (bcrypt hashes from before the switch are
+# verified and re-hashed on the next successful login)
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 65536  # KiB (64 MiB)
+ARGON2_PARALLELISM = 2
 
 
 # ============================================================================
 # LOGGING
 # ============================================================================
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
 
@@ -214,28 +293,22 @@ def validate_text_length(text: str) -> bool:
 
 
 def validate_mime_type(mime_type: str, content_type: str) -> bool:
-    """Validate MIME type against allowed types"""
-    mime_type = mime_type.lower()
+    """Validate MIME type against allowed types (mime_type must already be lowercase)"""
+    return mime_type in _ALLOWED_TYPES_BY_CONTENT.get(content_type, _NO_ALLOWED_TYPES)
+
+
+def validate_magic_bytes(data: Union[bytes, memoryview], file_type: str) -> bool:
+    """
+    Validate file magic bytes to prevent MIME type spoofing
     
-    if content_type == 'image':
-        return mime_type in ALLOWED_IMAGE_TYPES
-    elif content_type == 'video':
-        return mime_type in ALLOWED_VIDEO_TYPES
-    elif content_type == 'audio':
-        return mime_type in ALLOWED_AUDIO_TYPES
-    return False
-
-
-def validate_magic_bytes(data: bytes, file_type: str) -> bool:
-    """Validate file magic bytes to prevent MIME type spoofing"""
-    if file_type not in MAGIC_BYTES_SIGNATURES:
+    Only the first MAGIC_BYTES_HEADER_SIZE bytes are inspected, so callers can
+    pass a memoryview over (or just the head of) the upload without copying it.
+    """
+    matcher = _MAGIC_MATCHERS.get(file_type)
+    if matcher is None:
         return True  # No signature check available
     
-    signatures = MAGIC_BYTES_SIGNATURES[file_type]
-    for signature in signatures:
-        if data.startswith(signature):
-            return True
-    return False
+    return matcher(data)
 
 
 # ============================================================================
@@ -253,8 +326,11 @@ def validate_config():
     if JWT_SECRET_KEY == 'change-this-in-production' and ENV == Environment.PRODUCTION:
         errors.append("JWT_SECRET_KEY must be changed in production")
     
+    if not _ENV.get('ENCRYPTION_KEY') and ENV == Environment.PRODUCTION:
+        errors.append("ENCRYPTION_KEY must be set in production")
+    
     # Check pricing logic
-    if TIER_PRICING[PricingTier.PREMIUM] < TIER_LIMITS[PricingTier.PREMIUM] * COST_PER_ANALYSIS['image']:
+    if profit_margin() < 0:
         errors.append(f"Premium tier pricing is not profitable! "
                      f"Price: ₹{TIER_PRICING[PricingTier.PREMIUM]}, "
                      f"Max cost: ₹{TIER_LIMITS[PricingTier.PREMIUM] * COST_PER_ANALYSIS['image']}")
@@ -287,7 +363,7 @@ if __name__ == "__main__":
         print(f"🚀 VeriSure Configuration v{API_VERSION}")
         print(f"Environment: {ENV}")
         print(f"API Prefix: {API_PREFIX}")
-        print(f"Pricing Tiers: {TIER_PRICING}")
+        print(f"Pricing Tiers: {dict(TIER_PRICING)}")
         print(f"Rate Limits: {RATE_LIMITS}")
         print(f"Features: {FEATURES}")
     except ValueError as e:
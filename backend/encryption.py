@@ -3,26 +3,180 @@ Encryption Utilities for Data at Rest
 Field-level encryption for sensitive data
 """
 import os
-import base64
+import hashlib
+import hmac
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.backends import default_backend
-from typing import Optional, Any
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, AESSIV
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import Optional, Any, Dict, Tuple
 import json
 
+# SIMD base64 (stdlib base64 is used when pybase64 isn't installed)
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64  # type: ignore[no-redef]
+
+# Fast JSON (stdlib json is used when orjson isn't installed)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-# Encryption key from environment or generate new one
-ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY')
 
-if not ENCRYPTION_KEY:
-    # Generate a new key if not provided
-    ENCRYPTION_KEY = Fernet.generate_key().decode('utf-8')
+def _json_dumps(data: Any) -> bytes:
+    """Serialize a value to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data).encode('utf-8')
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Plaintext type tags (first byte inside the ciphertext)
+_TAG_STR = b'R'
+_TAG_BYTES = b'B'
+_TAG_JSON = b'J'
+
+# PBKDF2-HMAC-SHA256 iterations (OWASP 2023 guidance)
+PBKDF2_ITERATIONS = 600000
+PBKDF2_CACHE_SIZE = 64
+
+# Document key holding fields encrypted together by encrypt_fields_bundle
+BUNDLE_FIELD = '_encrypted_bundle'
+
+# Fields whose values are low-entropy and safe to encrypt deterministically
+# (equal plaintexts give equal ciphertexts, so they can be cached and deduplicated)
+DETERMINISTIC_FIELDS: frozenset = frozenset({'country', 'tier', 'plan_name'})
+DETERMINISTIC_CACHE_SIZE = 4096
+
+# Stored token formats, told apart by their first character:
+#   'A...'      urlsafe_b64(0x02 | nonce | AES-256-GCM ciphertext)  (current)
+#               urlsafe_b64(0x03 | AES-SIV ciphertext)  (DETERMINISTIC_FIELDS)
+#   'gAAAAA...' Fernet token                                        (read-only)
+#   other       base64(Fernet token) around a JSON payload          (read-only)
+_AESGCM_VERSION = b'\x02'
+_AESSIV_VERSION = b'\x03'
+_VERSIONED_TOKEN_PREFIX = 'A'  # base64 of a leading 0x02/0x03 byte always starts with 'A'
+_AESGCM_NONCE_SIZE = 12
+_FERNET_TOKEN_PREFIX = 'gAAAAA'
+
+# Encryption key from environment; read on first use (after .env is loaded),
+# not at import time
+def _load_default_key() -> str:
+    """
+    Return ENCRYPTION_KEY, or a temporary key outside production
+    
+    Raises:
+        RuntimeError: ENCRYPTION_KEY is not set and ENVIRONMENT is production
+    """
+    key = os.environ.get('ENCRYPTION_KEY')
+    if key:
+        logger.info("✅ Encryption enabled with environment key")
+        return key
+    
+    if os.environ.get('ENVIRONMENT', 'development') == 'production':
+        raise RuntimeError("ENCRYPTION_KEY must be set in production")
+    
     logger.warning("⚠️ No ENCRYPTION_KEY in environment. Generated temporary key. Set ENCRYPTION_KEY in .env for production.")
-else:
-    logger.info("✅ Encryption enabled with environment key")
+    return Fernet.generate_key().decode('utf-8')
+
+
+# Field name -> name of its encrypted counterpart, filled on first use
+_ENCRYPTED_NAME_CACHE: Dict[str, str] = {}
+
+
+def _encrypted_name(field: str) -> str:
+    """Name under which an encrypted field is stored"""
+    name = _ENCRYPTED_NAME_CACHE.get(field)
+    if name is None:
+        name = _ENCRYPTED_NAME_CACHE.setdefault(field, field + '_encrypted')
+    return name
+
+
+def _derive_subkey(master: bytes, length: int, info: bytes) -> bytes:
+    """Derive an algorithm-specific key from the master key with HKDF-SHA256"""
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=None, info=info).derive(master)
+
+
+def _build_ciphers(key) -> Tuple[Fernet, AESGCM, AESSIV]:
+    """
+    Build the ciphers for a base64-encoded key
+    
+    The AES-256-GCM and AES-SIV keys are derived from the key with HKDF so the
+    same secret isn't used directly by several algorithms; Fernet is kept to
+    read old values.
+    """
+    key_bytes = key.encode('utf-8') if isinstance(key, str) else key
+    legacy_cipher = Fernet(key_bytes)
+    master = base64.urlsafe_b64decode(key_bytes)
+    aead = AESGCM(_derive_subkey(master, 32, b'verisure-field-encryption-aes256gcm'))
+    siv = AESSIV(_derive_subkey(master, 64, b'verisure-field-encryption-aes256siv'))
+    return legacy_cipher, aead, siv
+
+
+def _pbkdf2_sha256(password: bytes, salt: bytes, iterations: int) -> bytes:
+    """32-byte PBKDF2-HMAC-SHA256 key"""
+    return hashlib.pbkdf2_hmac('sha256', password, salt, iterations, dklen=32)
+
+
+# Re-deriving a key for a known (password, salt) pair skips the PBKDF2 rounds.
+# Entries are keyed by an HMAC of the password under a per-process random key,
+# so the cache never holds plaintext passwords (nor a fast-to-guess plain hash)
+_PBKDF2_CACHE_KEY = os.urandom(32)
+_pbkdf2_cache: "OrderedDict[Tuple[bytes, bytes, int], bytes]" = OrderedDict()
+_pbkdf2_cache_lock = threading.Lock()
+
+
+def _pbkdf2_sha256_cached(password: bytes, salt: bytes, iterations: int) -> bytes:
+    """_pbkdf2_sha256, memoized for the last PBKDF2_CACHE_SIZE (password, salt, iterations)"""
+    cache_key = (hmac.new(_PBKDF2_CACHE_KEY, password, hashlib.sha256).digest(), salt, iterations)
+    with _pbkdf2_cache_lock:
+        derived = _pbkdf2_cache.get(cache_key)
+        if derived is not None:
+            _pbkdf2_cache.move_to_end(cache_key)
+            return derived
+    
+    derived = _pbkdf2_sha256(password, salt, iterations)
+    with _pbkdf2_cache_lock:
+        _pbkdf2_cache[cache_key] = derived
+        if len(_pbkdf2_cache) > PBKDF2_CACHE_SIZE:
+            _pbkdf2_cache.popitem(last=False)
+    return derived
+
+
+@lru_cache(maxsize=DETERMINISTIC_CACHE_SIZE)
+def _encrypt_deterministic(siv: AESSIV, value: str) -> str:
+    """AES-SIV token for a string value (memoized: same input, same token)"""
+    sealed = siv.encrypt(_TAG_STR + value.encode('utf-8'), None)
+    return base64.urlsafe_b64encode(_AESSIV_VERSION + sealed).decode('ascii')
+
+
+@lru_cache(maxsize=None)
+def _default_ciphers() -> Tuple[Fernet, AESGCM, AESSIV]:
+    """Ciphers for the default key, shared by every manager that doesn't pass its own key"""
+    return _build_ciphers(_load_default_key())
+
+
+def init_default_encryption() -> None:
+    """
+    Resolve the default encryption key now instead of on the first encrypt/decrypt
+    
+    Call at startup so a missing ENCRYPTION_KEY in production fails immediately.
+    """
+    _default_ciphers()
 
 
 class EncryptionManager:
@@ -33,36 +187,65 @@ class EncryptionManager:
         Initialize encryption manager
         
         Args:
-            encryption_key: Base64-encoded Fernet key
+            encryption_key: Base64-encoded Fernet key (default: shared ENCRYPTION_KEY
+                ciphers, resolved on first use)
         """
-        key = encryption_key or ENCRYPTION_KEY
+        self._ciphers: Optional[Tuple[Fernet, AESGCM, AESSIV]] = None
+        if not encryption_key:
+            return
         
         try:
-            self.cipher = Fernet(key.encode('utf-8') if isinstance(key, str) else key)
+            self._ciphers = _build_ciphers(encryption_key)
             logger.info("✅ Encryption manager initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize encryption: {str(e)}")
             raise
     
+    def _get_ciphers(self) -> Tuple[Fernet, AESGCM, AESSIV]:
+        """Return this manager's ciphers, resolving the default key on first use"""
+        if self._ciphers is None:
+            self._ciphers = _default_ciphers()
+        return self._ciphers
+    
+    @property
+    def cipher(self) -> Fernet:
+        """Fernet cipher (reads values written before the AES-GCM switch)"""
+        return self._get_ciphers()[0]
+    
+    @property
+    def aead(self) -> AESGCM:
+        """AES-256-GCM cipher for new values"""
+        return self._get_ciphers()[1]
+    
+    @property
+    def siv(self) -> AESSIV:
+        """AES-SIV cipher for DETERMINISTIC_FIELDS"""
+        return self._get_ciphers()[2]
+    
     def encrypt(self, data: Any) -> str:
         """
         Encrypt data
         
+        str/bytes values are encrypted as-is; anything else is JSON-serialized.
+        A one-byte type tag inside the ciphertext tells decrypt() how to restore it.
+        
         Args:
-            data: Data to encrypt (any JSON-serializable type)
+            data: Data to encrypt (str, bytes or any JSON-serializable type)
             
         Returns:
-            Encrypted data as base64 string
+            Versioned AES-256-GCM token (URL-safe base64)
         """
         try:
-            # Convert to JSON string
-            json_data = json.dumps(data)
-            
-            # Encrypt
-            encrypted = self.cipher.encrypt(json_data.encode('utf-8'))
+            if isinstance(data, str):
+                payload = _TAG_STR + data.encode('utf-8')
+            elif isinstance(data, bytes):
+                payload = _TAG_BYTES + data
+            else:
+                payload = _TAG_JSON + _json_dumps(data)
             
-            # Return as base64 string
-            return base64.b64encode(encrypted).decode('utf-8')
+            nonce = os.urandom(_AESGCM_NONCE_SIZE)
+            sealed = self.aead.encrypt(nonce, payload, None)
+            return base64.urlsafe_b64encode(_AESGCM_VERSION + nonce + sealed).decode('ascii')
             
         except Exception as e:
             logger.error(f"Encryption error: {str(e)}")
@@ -73,29 +256,59 @@ class EncryptionManager:
         Decrypt data
         
         Args:
-            encrypted_data: Base64-encoded encrypted data
+            encrypted_data: Token from encrypt() (older Fernet formats are also accepted)
             
         Returns:
             Decrypted data (original type)
         """
         try:
-            # Decode from base64
-            encrypted_bytes = base64.b64decode(encrypted_data)
+            if encrypted_data.startswith(_VERSIONED_TOKEN_PREFIX):
+                blob = base64.urlsafe_b64decode(encrypted_data)
+                if blob[:1] == _AESSIV_VERSION:
+                    decrypted = self.siv.decrypt(blob[1:], None)
+                else:
+                    nonce = blob[1:1 + _AESGCM_NONCE_SIZE]
+                    decrypted = self.aead.decrypt(nonce, blob[1 + _AESGCM_NONCE_SIZE:], None)
+            elif encrypted_data.startswith(_FERNET_TOKEN_PREFIX):
+                decrypted = self.cipher.decrypt(encrypted_data.encode('ascii'))
+            else:
+                # Legacy format: base64(Fernet token) around a JSON payload
+                decrypted = self.cipher.decrypt(base64.b64decode(encrypted_data))
+                return _json_loads(decrypted)
             
-            # Decrypt
-            decrypted = self.cipher.decrypt(encrypted_bytes)
+            tag, payload = decrypted[:1], decrypted[1:]
             
-            # Parse JSON
-            return json.loads(decrypted.decode('utf-8'))
+            if tag == _TAG_STR:
+                return payload.decode('utf-8')
+            if tag == _TAG_BYTES:
+                return payload
+            return _json_loads(payload)
             
         except Exception as e:
             logger.error(f"Decryption error: {str(e)}")
             raise
     
+    def encrypt_deterministic(self, value: str) -> str:
+        """
+        Encrypt a string so equal values give equal tokens (AES-SIV)
+        
+        Only for low-entropy fields where revealing equality is acceptable;
+        results are memoized, so repeated values skip the cipher entirely.
+        
+        Args:
+            value: String to encrypt
+            
+        Returns:
+            Versioned AES-SIV token (URL-safe base64)
+        """
+        return _encrypt_deterministic(self.siv, value)
+    
     def encrypt_field(self, data: dict, field: str) -> dict:
         """
         Encrypt a specific field in a dictionary
         
+        String values of DETERMINISTIC_FIELDS are encrypted deterministically.
+        
         Args:
             data: Dictionary containing the field
             field: Field name to encrypt
@@ -103,9 +316,15 @@ class EncryptionManager:
         Returns:
             Dictionary with encrypted field
         """
-        if field in data and data[field] is not None:
-            data[f"{field}_encrypted"] = self.encrypt(data[field])
-            del data[field]  # Remove plaintext
+        value = data.get(field)
+        if value is not None:
+            if field in DETERMINISTIC_FIELDS and isinstance(value, str):
+                token = self.encrypt_deterministic(value)
+            else:
+                token = self.encrypt(value)
+            # Plaintext removed only once encryption succeeded
+            del data[field]
+            data[_encrypted_name(field)] = token
         return data
     
     def decrypt_field(self, data: dict, field: str) -> dict:
@@ -119,10 +338,53 @@ class EncryptionManager:
         Returns:
             Dictionary with decrypted field
         """
-        encrypted_field = f"{field}_encrypted"
-        if encrypted_field in data and data[encrypted_field] is not None:
-            data[field] = self.decrypt(data[encrypted_field])
-            del data[encrypted_field]  # Remove encrypted version
+        encrypted_field = _encrypted_name(field)
+        if data.get(encrypted_field) is not None:
+            value = self.decrypt(data[encrypted_field])
+            # Encrypted version removed only once decryption succeeded
+            del data[encrypted_field]
+            data[field] = value
+        return data
+    
+    def encrypt_fields_bundle(self, data: dict, fields: list) -> dict:
+        """
+        Encrypt several fields together with a single cipher call
+        
+        Present, non-None fields are moved into one JSON payload stored
+        under BUNDLE_FIELD.
+        
+        Args:
+            data: Dictionary containing the fields
+            fields: Field names to encrypt
+            
+        Returns:
+            Dictionary with the fields replaced by the encrypted bundle
+        """
+        bundle = {field: data[field] for field in fields if data.get(field) is not None}
+        if bundle:
+            token = self.encrypt(bundle)
+            # Plaintext fields removed only once the bundle is sealed
+            for field in bundle:
+                del data[field]
+            data[BUNDLE_FIELD] = token
+        return data
+    
+    def decrypt_fields_bundle(self, data: dict) -> dict:
+        """
+        Decrypt a bundle written by encrypt_fields_bundle
+        
+        Args:
+            data: Dictionary containing the encrypted bundle
+            
+        Returns:
+            Dictionary with the bundled fields restored
+        """
+        encrypted_bundle = data.get(BUNDLE_FIELD)
+        if encrypted_bundle is not None:
+            fields = self.decrypt(encrypted_bundle)
+            # Bundle removed only once it decrypted
+            del data[BUNDLE_FIELD]
+            data.update(fields)
         return data
     
     @staticmethod
@@ -136,29 +398,30 @@ class EncryptionManager:
         return Fernet.generate_key().decode('utf-8')
     
     @staticmethod
-    def derive_key_from_password(password: str, salt: Optional[bytes] = None) -> tuple:
+    def derive_key_from_password(
+        password: str,
+        salt: Optional[bytes] = None,
+        iterations: int = PBKDF2_ITERATIONS
+    ) -> tuple:
         """
-        Derive encryption key from password using PBKDF2
+        Derive encryption key from password using PBKDF2-HMAC-SHA256
         
         Args:
             password: Password to derive key from
             salt: Salt for key derivation (generated if not provided)
+            iterations: PBKDF2 iterations (pass 100000 to re-derive keys made before the OWASP bump)
             
         Returns:
             (key, salt) tuple
         """
         if salt is None:
+            # A fresh salt can never hit the cache, so don't keep it there
             salt = os.urandom(16)
+            derived = _pbkdf2_sha256(password.encode('utf-8'), salt, iterations)
+        else:
+            derived = _pbkdf2_sha256_cached(password.encode('utf-8'), salt, iterations)
         
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            backend=default_backend()
-        )
-        
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8')))
+        key = base64.urlsafe_b64encode(derived)
         return key.decode('utf-8'), base64.b64encode(salt).decode('utf-8')
 
 
@@ -166,10 +429,19 @@ class EncryptionManager:
 encryption_manager = EncryptionManager()
 
 
+def get_default_manager() -> EncryptionManager:
+    """Return the shared encryption manager (for dependency injection)"""
+    return encryption_manager
+
+
 def encrypt_sensitive_fields(document: dict, sensitive_fields: list) -> dict:
     """
     Encrypt multiple sensitive fields in a document
     
+    String values of DETERMINISTIC_FIELDS are encrypted one by one with
+    AES-SIV so equality lookups on them keep working; all other fields are
+    encrypted together as one bundle (one cipher call per document).
+    
     Args:
         document: Document to encrypt
         sensitive_fields: List of field names to encrypt
@@ -177,16 +449,21 @@ def encrypt_sensitive_fields(document: dict, sensitive_fields: list) -> dict:
     Returns:
         Document with encrypted fields
     """
+    bundled = []
     for field in sensitive_fields:
-        if field in document:
-            document = encryption_manager.encrypt_field(document, field)
-    return document
+        if field in DETERMINISTIC_FIELDS and isinstance(document.get(field), str):
+            encryption_manager.encrypt_field(document, field)
+        else:
+            bundled.append(field)
+    return encryption_manager.encrypt_fields_bundle(document, bundled)
 
 
 def decrypt_sensitive_fields(document: dict, sensitive_fields: list) -> dict:
     """
     Decrypt multiple sensitive fields in a document
     
+    Handles the bundled format as well as legacy per-field `<field>_encrypted` values.
+    
     Args:
         document: Document to decrypt
         sensitive_fields: List of field names to decrypt
@@ -194,8 +471,7 @@ def decrypt_sensitive_fields(document: dict, sensitive_fields: list) -> dict:
     Returns:
         Document with decrypted fields
     """
+    document = encryption_manager.decrypt_fields_bundle(document)
     for field in sensitive_fields:
-        encrypted_field = f"{field}_encrypted"
-        if encrypted_field in document:
-            document = encryption_manager.decrypt_field(document, field)
+        encryption_manager.decrypt_field(document, field)
     return document
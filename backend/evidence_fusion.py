@@ -0,0 +1,362 @@
+"""
+Evidence Fusion
+Combines forensic indicators with the AI opinion into a final verdict.
+Fully annotated so it compiles with mypyc; see the Dockerfile.
+"""
+import itertools
+import sys
+from enum import IntEnum
+from functools import lru_cache
+from typing import (
+    Any, Callable, Dict, Final, FrozenSet, List, NamedTuple, Sequence, Tuple
+)
+
+
+# (num_human, num_ai, num_manipulation, has_inconclusive, balance,
+#  ai_agrees_ai_generated, ai_agrees_original, ai_opinion_strong)
+FuseKey = Tuple[int, int, int, bool, int, bool, bool, bool]
+
+
+class Classification(IntEnum):
+    """Fused verdict classes; labels are applied when the report is built"""
+    LIKELY_AI = 0
+    LIKELY_ORIGINAL = 1
+    HYBRID = 2
+    UNCLEAR = 3
+    INCONCLUSIVE = 4
+
+
+class Confidence(IntEnum):
+    """Fused verdict confidence levels"""
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+
+# Report labels, indexed by Classification / Confidence value. Every result
+# shares these objects; interning extends that to equal strings elsewhere
+# (e.g. labels read back from JSON and interned), so comparisons against
+# them hit str's identity fast path
+CLASSIFICATION_LABELS: Final[Tuple[str, ...]] = tuple(map(sys.intern, (
+    "Likely AI-Generated", "Likely Original", "Hybrid / Manipulated", "Unclear / Mixed Signals", "Inconclusive"
+)))
+CONFIDENCE_LABELS: Final[Tuple[str, ...]] = tuple(map(sys.intern, ('low', 'medium', 'high')))
+
+# (classification, confidence, reason template id)
+Verdict = Tuple[Classification, Confidence, int]
+
+
+class FusionResult(NamedTuple):
+    """Fused verdict; unpacks like the plain 4-tuple fuse_evidence used to return"""
+    classification: str
+    confidence: str
+    reason: str
+    indicators: List[str]
+
+
+# Reason strings for fused verdicts, indexed by the template id _fuse_rules returns
+_REASON_TEMPLATES: Final[Tuple[str, ...]] = (
+    "Strong forensic evidence: {num_ai} AI generation indicators detected with no authentic signals",
+    "Forensic analysis ({num_ai} AI indicators) strongly supported by AI opinion analysis",
+    "Forensic analysis detected {num_ai} AI generation indicators with no human capture signals",
+    "Forensic AI indicator combined with strong AI opinion suggests synthetic content",
+    "Strong authenticity: {num_human} genuine capture signals with no AI indicators",
+    "Forensic authenticity ({num_human} signals) confirmed by AI visual analysis",
+    "Forensic analysis detected {num_human} authentic capture signals with no AI indicators",
+    "Authentic metadata combined with AI opinion suggests original content",
+    "Original content detected with {num_manipulation} manipulation indicators (edited/processed)",
+    "Authentic source with editing artifacts detected",
+    "Mixed signals: {num_ai} AI vs {num_human} human indicators, leaning AI-generated",
+    "Mixed signals: {num_human} human vs {num_ai} AI indicators, leaning original",
+    "Conflicting evidence: {num_human} human signals vs {num_ai} AI indicators",
+    "Limited forensic evidence supported by AI opinion suggests synthetic content",
+    "Limited forensic evidence supported by AI opinion suggests original content",
+    "No forensic evidence available; AI opinion suggests synthetic content (weak signal)",
+    "No forensic evidence available; AI opinion suggests original content (weak signal)",
+    "Insufficient evidence for classification ({total} indicators detected)",
+    "Evidence pattern does not match classification rules",
+)
+
+# Formatted fusion reasons kept, keyed by (template id, counts)
+REASON_CACHE_SIZE: Final = 1024
+
+# Free-form AI opinion classifications whose agreement flags are kept
+OPINION_FLAGS_CACHE_SIZE: Final = 256
+
+# Source labels on fused indicators
+_PREFIX_FORENSIC: Final = "[FORENSIC] "
+_PREFIX_FORENSIC_AI: Final = "[FORENSIC AI] "
+_PREFIX_FORENSIC_EDIT: Final = "[FORENSIC EDIT] "
+_PREFIX_AI_OPINION: Final = "[AI OPINION] "
+
+# AI opinion confidence levels strong enough to sway a verdict
+_STRONG_OPINION_CONFIDENCE: Final[FrozenSet[str]] = frozenset({'high', 'medium'})
+
+# No rule distinguishes counts above this, so counters are clamped to it
+_FUSE_COUNT_CAP: Final = 3
+
+
+class RuleInputs(NamedTuple):
+    """What the fusion rules test; counters may be clamped to _FUSE_COUNT_CAP"""
+    num_human: int
+    num_ai: int
+    num_manipulation: int
+    has_inconclusive: bool
+    balance: int  # sign of (num_ai - num_human) on the unclamped counts
+    ai_agrees_ai_generated: bool
+    ai_agrees_original: bool
+    ai_opinion_strong: bool
+    total_evidence: int
+
+
+# Ordered (predicate, classification, confidence, reason template id) rules;
+# the first matching rule decides
+_FUSE_RULES: Final[Tuple[Tuple[Callable[[RuleInputs], bool], Classification, Confidence, int], ...]] = (
+    # RULE 1: Strong AI-Generated Evidence
+    # Need at least 2 AI signals, or 1 strong signal + AI opinion agreement
+    (lambda e: e.num_ai >= 3 and e.num_human == 0,
+     Classification.LIKELY_AI, Confidence.HIGH, 0),
+    (lambda e: e.num_ai >= 2 and e.num_human == 0 and e.ai_agrees_ai_generated and e.ai_opinion_strong,
+     Classification.LIKELY_AI, Confidence.HIGH, 1),
+    (lambda e: e.num_ai >= 2 and e.num_human == 0,
+     Classification.LIKELY_AI, Confidence.MEDIUM, 2),
+    (lambda e: e.num_ai >= 1 and e.num_human == 0 and e.ai_agrees_ai_generated and e.ai_opinion_strong,
+     Classification.LIKELY_AI, Confidence.MEDIUM, 3),
+    
+    # RULE 2: Strong Human/Original Evidence
+    # Need at least 2 human signals, or strong metadata + no AI signals
+    (lambda e: e.num_human >= 3 and e.num_ai == 0,
+     Classification.LIKELY_ORIGINAL, Confidence.HIGH, 4),
+    (lambda e: e.num_human >= 2 and e.num_ai == 0 and e.ai_agrees_original and e.ai_opinion_strong,
+     Classification.LIKELY_ORIGINAL, Confidence.HIGH, 5),
+    (lambda e: e.num_human >= 2 and e.num_ai == 0,
+     Classification.LIKELY_ORIGINAL, Confidence.MEDIUM, 6),
+    (lambda e: e.num_human >= 1 and e.num_ai == 0 and e.ai_agrees_original and e.ai_opinion_strong,
+     Classification.LIKELY_ORIGINAL, Confidence.MEDIUM, 7),
+    
+    # RULE 3: Hybrid / Manipulated (human source + editing/manipulation)
+    (lambda e: e.num_human >= 1 and e.num_manipulation >= 3,
+     Classification.HYBRID, Confidence.HIGH, 8),
+    (lambda e: e.num_human >= 1 and e.num_manipulation >= 2,
+     Classification.HYBRID, Confidence.MEDIUM, 8),
+    (lambda e: e.num_human >= 1 and e.num_manipulation >= 1,
+     Classification.HYBRID, Confidence.MEDIUM, 9),
+    
+    # RULE 4: Conflicting Evidence - use AI opinion as tiebreaker
+    (lambda e: e.num_human >= 1 and e.num_ai >= 1 and e.balance > 0 and e.ai_agrees_ai_generated,
+     Classification.LIKELY_AI, Confidence.LOW, 10),
+    (lambda e: e.num_human >= 1 and e.num_ai >= 1 and e.balance < 0 and e.ai_agrees_original,
+     Classification.LIKELY_ORIGINAL, Confidence.LOW, 11),
+    (lambda e: e.num_human >= 1 and e.num_ai >= 1,
+     Classification.UNCLEAR, Confidence.LOW, 12),
+    
+    # RULE 5: Single strong indicator with AI opinion support
+    (lambda e: e.total_evidence == 1 and e.num_ai == 1 and e.ai_agrees_ai_generated and e.ai_opinion_strong,
+     Classification.LIKELY_AI, Confidence.LOW, 13),
+    (lambda e: e.total_evidence == 1 and e.num_human == 1 and e.ai_agrees_original and e.ai_opinion_strong,
+     Classification.LIKELY_ORIGINAL, Confidence.LOW, 14),
+    
+    # RULE 6: Insufficient evidence - use AI opinion as weak signal
+    (lambda e: (e.total_evidence == 0 or e.has_inconclusive) and e.ai_agrees_ai_generated and e.ai_opinion_strong,
+     Classification.UNCLEAR, Confidence.LOW, 15),
+    (lambda e: (e.total_evidence == 0 or e.has_inconclusive) and e.ai_agrees_original and e.ai_opinion_strong,
+     Classification.UNCLEAR, Confidence.LOW, 16),
+    (lambda e: e.total_evidence == 0 or e.has_inconclusive,
+     Classification.INCONCLUSIVE, Confidence.LOW, 17),
+)
+
+
+def _fuse_rules(num_human: int, num_ai: int, num_manipulation: int, has_inconclusive: bool,
+                balance: int, ai_agrees_ai_generated: bool, ai_agrees_original: bool,
+                ai_opinion_strong: bool) -> Verdict:
+    """
+    Apply _FUSE_RULES; only runs while _FUSE_TABLE is built.
+    
+    Returns:
+        (classification, confidence, reason template id)
+    """
+    inputs = RuleInputs(
+        num_human, num_ai, num_manipulation, has_inconclusive, balance,
+        ai_agrees_ai_generated, ai_agrees_original, ai_opinion_strong,
+        num_human + num_ai + num_manipulation
+    )
+    for predicate, classification, confidence, template_id in _FUSE_RULES:
+        if predicate(inputs):
+            return classification, confidence, template_id
+    
+    # Default: Inconclusive
+    return Classification.INCONCLUSIVE, Confidence.LOW, 18
+
+
+@lru_cache(maxsize=OPINION_FLAGS_CACHE_SIZE)
+def _opinion_flags(ai_classification: str) -> Tuple[bool, bool]:
+    """Whether an AI opinion classification reads as (AI-generated, original)"""
+    # Free-form answers put the label mid-sentence ("Most likely AI-generated"),
+    # so these stay substring tests; prefix checks would miss them, and one
+    # combined regex scan is slower than four `in` tests on strings this short
+    lowered: str = ai_classification.lower()
+    return (
+        'likely ai' in lowered or 'ai-generated' in lowered,
+        'likely original' in lowered or 'likely human' in lowered
+    )
+
+
+# Flags for the classifications the AI opinion prompt asks for; free-form
+# answers go through _opinion_flags
+_OPINION_FLAGS: Final[Dict[str, Tuple[bool, bool]]] = {
+    classification: _opinion_flags(classification) for classification in CLASSIFICATION_LABELS
+}
+
+
+# Every reachable rule input, precomputed so fuse_evidence is one dict lookup
+_FUSE_KEY_VALUES: Final[Tuple[Tuple[Any, ...], ...]] = (
+    tuple(range(_FUSE_COUNT_CAP + 1)), tuple(range(_FUSE_COUNT_CAP + 1)), tuple(range(_FUSE_COUNT_CAP + 1)),
+    (False, True), (-1, 0, 1), (False, True), (False, True), (False, True)
+)
+_FUSE_TABLE: Final[Dict[FuseKey, Verdict]] = {
+    key: _fuse_rules(*key) for key in itertools.product(*_FUSE_KEY_VALUES)
+}
+
+
+class FusionSignals:
+    """
+    Evidence fuse_evidence reads from the forensic and AI opinion reports.
+    
+    A slotted class rather than a dict or NamedTuple: fields are fixed
+    offsets (C struct members once compiled) read several times per fusion.
+    """
+    __slots__ = (
+        'human_signals', 'ai_signals', 'manipulation_signals', 'inconclusive_signals',
+        'ai_classification', 'ai_confidence', 'ai_indicators'
+    )
+    
+    def __init__(self, human_signals: Sequence[str], ai_signals: Sequence[str],
+                 manipulation_signals: Sequence[str], inconclusive_signals: Sequence[str],
+                 ai_classification: str, ai_confidence: str, ai_indicators: Sequence[Any]) -> None:
+        self.human_signals = human_signals
+        self.ai_signals = ai_signals
+        self.manipulation_signals = manipulation_signals
+        self.inconclusive_signals = inconclusive_signals
+        self.ai_classification = ai_classification
+        self.ai_confidence = ai_confidence
+        self.ai_indicators = ai_indicators
+
+
+def _combine_indicators(signals: FusionSignals) -> List[str]:
+    """Combined, source-labelled indicators for a fused report"""
+    # Built in place in one list
+    items: List[str] = [_PREFIX_FORENSIC + s for s in signals.human_signals]
+    items.extend([_PREFIX_FORENSIC_AI + s for s in signals.ai_signals])
+    items.extend([_PREFIX_FORENSIC_EDIT + s for s in signals.manipulation_signals])
+    # Opinion signals come from parsed model JSON and may not be strings
+    items.extend([_PREFIX_AI_OPINION + str(s) for s in itertools.islice(signals.ai_indicators, 3)])
+    return items
+
+
+def _extract_signals(forensic_analysis: Dict[str, Any], ai_analysis: Dict[str, Any]) -> FusionSignals:
+    """Pull the signal lists and AI opinion out of the two reports"""
+    # Missing (or null) sections fall back to shared empty tuples rather
+    # than a fresh default container per call
+    forensic_indicators: Dict[str, Any] = forensic_analysis.get('forensic_indicators') or {}
+    ai_opinion: Dict[str, Any] = ai_analysis.get('origin') or {}
+    return FusionSignals(
+        forensic_indicators.get('human_signals') or (),
+        forensic_indicators.get('ai_signals') or (),
+        forensic_indicators.get('manipulation_signals') or (),
+        forensic_indicators.get('inconclusive_signals') or (),
+        ai_opinion.get('classification', 'Unclear / Mixed Signals'),
+        ai_opinion.get('confidence', 'low'),
+        ai_analysis.get('ai_signals') or ()
+    )
+
+
+def _fusion_key(signals: FusionSignals) -> FuseKey:
+    """Reduce extracted signals to their _FUSE_TABLE key"""
+    num_human: int = len(signals.human_signals)
+    num_ai: int = len(signals.ai_signals)
+    num_manipulation: int = len(signals.manipulation_signals)
+    
+    # Check if AI opinion agrees with forensics (for stronger confidence).
+    # The first branches of rules 1 and 2 decide on counts alone, so the
+    # opinion isn't read at all there
+    ai_agrees_ai_generated: bool
+    ai_agrees_original: bool
+    ai_opinion_strong: bool
+    if (num_ai >= 3 and num_human == 0) or (num_human >= 3 and num_ai == 0):
+        ai_agrees_ai_generated = ai_agrees_original = ai_opinion_strong = False
+    else:
+        ai_agrees_ai_generated, ai_agrees_original = (
+            _OPINION_FLAGS.get(signals.ai_classification) or _opinion_flags(signals.ai_classification)
+        )
+        ai_opinion_strong = signals.ai_confidence in _STRONG_OPINION_CONFIDENCE
+    
+    # Only presence of inconclusive signals matters, so the list's truthiness
+    # is used rather than its length; clamps are inline to skip min() calls
+    return (
+        num_human if num_human < _FUSE_COUNT_CAP else _FUSE_COUNT_CAP,
+        num_ai if num_ai < _FUSE_COUNT_CAP else _FUSE_COUNT_CAP,
+        num_manipulation if num_manipulation < _FUSE_COUNT_CAP else _FUSE_COUNT_CAP,
+        bool(signals.inconclusive_signals),
+        (num_ai > num_human) - (num_ai < num_human),
+        ai_agrees_ai_generated,
+        ai_agrees_original,
+        ai_opinion_strong
+    )
+
+
+def _classify(key: FuseKey) -> Verdict:
+    """Verdict for a fusion key; every reachable key is precomputed"""
+    return _FUSE_TABLE[key]
+
+
+@lru_cache(maxsize=REASON_CACHE_SIZE)
+def _format_reason(template_id: int, num_human: int, num_ai: int, num_manipulation: int) -> str:
+    """Fill a reason template; counts are small, so nearly every call is a cache hit"""
+    return _REASON_TEMPLATES[template_id].format(
+        num_ai=num_ai, num_human=num_human, num_manipulation=num_manipulation,
+        total=num_human + num_ai + num_manipulation
+    )
+
+
+def _build_report(signals: FusionSignals, verdict: Verdict) -> FusionResult:
+    """Format the reason for a verdict and attach the combined indicators"""
+    classification, confidence, template_id = verdict
+    reason: str = _format_reason(
+        template_id, len(signals.human_signals), len(signals.ai_signals), len(signals.manipulation_signals)
+    )
+    return FusionResult(
+        CLASSIFICATION_LABELS[classification], CONFIDENCE_LABELS[confidence], reason, _combine_indicators(signals)
+    )
+
+
+def fuse_evidence(forensic_analysis: Dict[str, Any], ai_analysis: Dict[str, Any]) -> FusionResult:
+    """
+    Fuse forensic evidence with AI opinion using IMPROVED strict rules.
+    
+    Enhanced Rules for Better Accuracy:
+    1. ≥3 AI indicators OR (≥2 AI + AI opinion agrees) → Likely AI-Generated
+    2. ≥3 Human signals OR (≥2 Human + no AI signals) → Likely Original
+    3. Human + manipulation → Hybrid / Manipulated
+    4. Weighted scoring system for better confidence levels
+    5. AI opinion only used as tiebreaker
+    
+    Returns:
+        FusionResult(classification, confidence, reason, indicators)
+    """
+    signals = _extract_signals(forensic_analysis, ai_analysis)
+    return _build_report(signals, _classify(_fusion_key(signals)))
+
+
+def fuse_evidence_batch(analyses: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[FusionResult]:
+    """
+    Fuse many (forensic_analysis, ai_analysis) pairs at once, e.g. for re-scoring.
+    Results match calling fuse_evidence on each pair.
+    """
+    # Per-row work is reading the report dicts; the verdict itself is one
+    # lookup of an existing key tuple, which beats packing the keys into
+    # arrays for a vectorized (NumPy or Numba) gather
+    results: List[FusionResult] = []
+    for forensic_analysis, ai_analysis in analyses:
+        signals = _extract_signals(forensic_analysis, ai_analysis)
+        results.append(_build_report(signals, _FUSE_TABLE[_fusion_key(signals)]))
+    return results
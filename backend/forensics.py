@@ -6,33 +6,209 @@ AI opinion is secondary to hard forensic evidence.
 
 import exifread
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import TAGS, GPSTAGS
 import io
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+import os
+import shutil
+import copy
+import importlib.util
+import threading
+import time
+import subprocess
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, Optional
+from collections import OrderedDict
+from fractions import Fraction
+from functools import lru_cache
+from types import ModuleType
 import hashlib
 import json
 import logging
+import re
+import numpy as np
 
-# Audio analysis
+# Verdict rules live in their own mypyc-compiled module; re-exported here
+from evidence_fusion import Classification, Confidence, FusionResult, fuse_evidence, fuse_evidence_batch
+
+# SIMD tree hash for content fingerprints; hashlib's BLAKE2b otherwise
 try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# Audio analysis; librosa (scipy, numba JIT) and torch are imported by the
+# first audio request, so image- and video-only workers never load them
+AUDIO_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ('librosa', 'soundfile', 'mutagen'))
+
+
+class _AudioModules(NamedTuple):
+    librosa: Any
+    sf: Any
+    MutagenFile: Any
+
+
+@lru_cache(maxsize=1)
+def _audio_modules() -> _AudioModules:
+    """The audio decoding/feature libraries, imported on first use"""
     import librosa
-    import soundfile as sf
-    import numpy as np
+    import soundfile
     from mutagen import File as MutagenFile
-    AUDIO_AVAILABLE = True
-except ImportError:
-    AUDIO_AVAILABLE = False
+    return _AudioModules(librosa, soundfile, MutagenFile)
+
+
+@lru_cache(maxsize=1)
+def _gpu_torch() -> Optional[ModuleType]:
+    """torch for GPU spectral features, or None without CUDA; imported on first use"""
+    try:
+        import torch
+    except ImportError:
+        return None
+    return torch if torch.cuda.is_available() else None
 
 # Video analysis
-try:
-    import ffmpeg
-    VIDEO_AVAILABLE = True
-except ImportError:
-    VIDEO_AVAILABLE = False
+VIDEO_AVAILABLE = shutil.which('ffprobe') is not None
 
 logger = logging.getLogger(__name__)
 
+# Last EXIF tag (0xA434, EXIF sub-IFD) used by _analyze_exif; exifread
+# stop_tag takes the bare tag name and applies to every IFD
+EXIF_STOP_TAG = 'LensModel'
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+# EXIF keys read by _analyze_exif, in priority order where one value is taken
+EXIF_CAMERA_FIELDS = ('Image Make', 'Image Model', 'EXIF LensModel', 'EXIF LensMake')
+EXIF_SOFTWARE_FIELDS = ('Image Software', 'Software', 'EXIF Software')
+EXIF_DATETIME_FIELDS = ('Image DateTime', 'EXIF DateTimeOriginal', 'DateTime')
+EXIF_GPS_FIELDS = ('GPS GPSLatitude', 'GPS GPSLongitude')
+# Expected fields for real camera photos
+EXIF_EXPECTED_FIELDS = ('Image Make', 'Image Model', 'EXIF DateTimeOriginal', 'EXIF ExifVersion')
+
+# Small scalar/tuple image.info entries reported verbatim; anything else
+# (ICC/EXIF blobs, PNG text chunks, JPEG quantization tables) only by type
+IMAGE_INFO_SCALAR_KEYS = frozenset({
+    'dpi', 'jfif', 'jfif_version', 'jfif_unit', 'jfif_density',
+    'progressive', 'progression', 'chromaticity', 'gamma', 'interlace', 'aspect',
+    'compression', 'srgb'
+})
+
+# Formats parsed with exifread: JPEG, little/big-endian TIFF
+EXIFREAD_SIGNATURES = (b'\xff\xd8', b'II*\x00', b'MM\x00*')
+
+# Decoded bytes per pixel by Pillow mode, for compression ratios; len(mode)
+# is wrong for bilevel, 16-bit and 32-bit modes
+BYTES_PER_PIXEL = {
+    '1': 0.125, 'L': 1, 'P': 1, 'LA': 2, 'PA': 2, 'La': 2,
+    'I;16': 2, 'I;16B': 2, 'I;16L': 2, 'I;16N': 2,
+    'RGB': 3, 'YCbCr': 3, 'LAB': 3, 'HSV': 3,
+    'RGBA': 4, 'RGBa': 4, 'RGBX': 4, 'CMYK': 4, 'I': 4, 'F': 4,
+}
+
+# IJG (libjpeg) reference quantization tables, natural order. libjpeg-based
+# encoders (Pillow, browsers, most web tools) scale these by quality, but so
+# does plenty of phone and camera firmware, so a match is not evidence either way
+IJG_LUMINANCE_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+)
+IJG_CHROMINANCE_TABLE = (
+    17, 18, 24, 47, 99, 99, 99, 99, 18, 21, 26, 66, 99, 99, 99, 99,
+    24, 26, 56, 99, 99, 99, 99, 99, 47, 66, 99, 99, 99, 99, 99, 99,
+) + (99,) * 32
+
+# JPEG quality below which re-encoding is reported
+LOW_JPEG_QUALITY = 75
+
+# Seconds of audio, from the start, decoded for signal analysis; spectral
+# and pitch statistics settle well within this for AI-vs-human decisions
+AUDIO_ANALYSIS_WINDOW = 15.0
+
+# Only the container fields analyze_video reads are requested from ffprobe
+FFPROBE_ENTRIES = (
+    'format=format_name,duration,size,bit_rate:format_tags'
+    ':stream=codec_type,codec_name,profile,r_frame_rate,width,height'
+)
+
+# Video traits typical of real camera recordings
+DEVICE_METADATA_KEYS = ('com.android.version', 'com.apple.quicktime.make')
+CAMERA_H264_PROFILES = frozenset({'High', 'Main'})
+STANDARD_FRAME_RATES = frozenset({24, 25, 30, 60, 120})
+STANDARD_VIDEO_RESOLUTIONS = frozenset({
+    (1920, 1080), (1280, 720), (3840, 2160), (2560, 1440),
+    (720, 480), (1080, 1920)  # including portrait
+})
+
+# Sample rates typical of real recordings vs. TTS/AI audio
+STANDARD_RECORDING_SAMPLE_RATES = frozenset({44100, 48000})
+TTS_SAMPLE_RATES = frozenset({16000, 22050})
+
+# Frames quieter than this many dB below the loudest frame count as silence
+SILENCE_TOP_DB = 30
+
+# Frame hop shared by the energy, spectral and silence features
+AUDIO_HOP_LENGTH = 512
+
+# Pitch search range (Hz) for librosa.yin
+PITCH_FMIN = 50
+PITCH_FMAX = 2000
+
+# Memory-backed directory for media handed to ffprobe/ffmpeg/librosa;
+# None (no tmpfs, e.g. macOS) means the default temp dir
+MEDIA_TEMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+# Recent analysis results kept per analyzer, keyed by content hash,
+# for at most ANALYSIS_CACHE_TTL seconds
+ANALYSIS_CACHE_SIZE = 128
+ANALYSIS_CACHE_TTL = 3600.0
+
+
+# 8-bit channel levels, and their squares, for moments from histograms
+_LEVELS = np.arange(256, dtype=np.int64)
+_LEVELS_SQUARED = _LEVELS * _LEVELS
+
+
+def _ijg_scaled_table(table: Tuple[int, ...], quality: int) -> Tuple[int, ...]:
+    """IJG reference table scaled as libjpeg's jpeg_set_quality does"""
+    scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+    return tuple(min(max((value * scale + 50) // 100, 1), 255) for value in table)
+
+
+# Exact libjpeg (luminance, chrominance) tables -> the quality that made them;
+# grayscale JPEGs carry no chrominance table, keyed by an empty one
+_IJG_TABLE_QUALITY = {
+    (_ijg_scaled_table(IJG_LUMINANCE_TABLE, quality), chrominance): quality
+    for quality in range(1, 101)
+    for chrominance in (_ijg_scaled_table(IJG_CHROMINANCE_TABLE, quality), ())
+}
+
+
+@lru_cache(maxsize=64)
+def _parse_frame_rate(frame_rate: str) -> float:
+    """Frames per second from an ffprobe rate like '30000/1001'; 0.0 if malformed"""
+    try:
+        return float(Fraction(frame_rate))
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _is_standard_frame_rate(fps: float) -> bool:
+    """True for STANDARD_FRAME_RATES and their NTSC (x1000/1001) variants"""
+    nominal = round(fps)
+    return nominal in STANDARD_FRAME_RATES and (abs(fps - nominal) < 0.01 or abs(fps * 1.001 - nominal) < 0.01)
+
+
+def _histogram_moments(histogram: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-channel mean and population std from a (channels, 256) count array.
+    Integer sums over 256 levels are exact and far cheaper than touching pixels.
+    """
+    counts = np.maximum(histogram.sum(axis=1), 1)
+    means = histogram @ _LEVELS / counts
+    return means, np.sqrt(np.maximum(histogram @ _LEVELS_SQUARED / counts - means * means, 0.0))
+
 
 class ForensicAnalyzer:
     """Main forensic analysis engine"""
@@ -43,18 +219,101 @@ class ForensicAnalyzer:
             'artificial intelligence', 'generated', 'synthetic', 'deepfake',
             'gan', 'diffusion', 'neural'
         ]
+        # Lowercased snapshot matched against lowercased software strings
+        self._ai_keywords_lc = tuple(keyword.lower() for keyword in self.ai_generation_keywords)
+        # Single-pass prefilter: most software strings contain none of the keywords
+        self._ai_keyword_re = re.compile('|'.join(re.escape(keyword) for keyword in self._ai_keywords_lc))
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+    
+    def _cached_analysis(self, media_type: str, media_bytes: bytes, analyze: Callable[[bytes], Dict]) -> Dict:
+        """
+        Return analyze(media_bytes), reusing the result for identical content.
+        Callers get their own copy since they extend the indicator lists.
+        """
+        key = self._cache_key(media_type, media_bytes)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        
+        result = analyze(media_bytes)
+        self._cache_store(key, result)
+        return result
+    
+    @staticmethod
+    def _fingerprint(data: bytes) -> str:
+        """128-bit hex content hash of a media payload"""
+        if BLAKE3_AVAILABLE:
+            return blake3.blake3(data).hexdigest(length=16)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _cache_key(media_type: str, media_bytes: bytes) -> Tuple[str, str]:
+        """Result cache key: media type and content hash"""
+        return media_type, ForensicAnalyzer._fingerprint(media_bytes)
+    
+    def _cache_lookup(self, key: Tuple[str, str]) -> Optional[Dict]:
+        """Copy of the unexpired cached result for key, or None"""
+        with self._result_cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, cached = entry
+            if time.monotonic() - stored_at > ANALYSIS_CACHE_TTL:
+                del self._result_cache[key]
+                return None
+            self._result_cache.move_to_end(key)
+        return copy.deepcopy(cached)
+    
+    def _cache_store(self, key: Tuple[str, str], result: Dict) -> None:
+        """Keep a copy of a successful result, evicting the least recently used"""
+        if 'error' in result:  # Failures may be transient, don't pin them
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = (time.monotonic(), copy.deepcopy(result))
+            self._result_cache.move_to_end(key)
+            if len(self._result_cache) > ANALYSIS_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+    
+    @staticmethod
+    def _write_temp_media(media_bytes: bytes, suffix: str) -> str:
+        """
+        Write media to a temp file for tools that need a path, in memory when
+        possible. Caller deletes the returned path.
+        """
+        if MEDIA_TEMP_DIR:
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(suffix=suffix, dir=MEDIA_TEMP_DIR, delete=False) as tmp:
+                    tmp_path = tmp.name
+                    tmp.write(media_bytes)
+                return tmp_path
+            except OSError as e:
+                # tmpfs is small in containers (64MB default); use disk instead
+                logger.warning(f"Falling back to disk temp file: {str(e)}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            tmp.write(media_bytes)
+            return tmp.name
     
     def analyze_image(self, image_bytes: bytes) -> Dict:
         """
         Analyze image for authenticity using forensic signals.
         Returns hard evidence, not AI opinion.
         """
+        return self._cached_analysis('image', image_bytes, self._analyze_image_uncached)
+    
+    def _analyze_image_uncached(self, image_bytes: bytes) -> Dict:
+        """Run the image analysis behind analyze_image"""
         try:
-            # Load image
+            # Load and decode image once; every step below reuses this object
             image = Image.open(io.BytesIO(image_bytes))
+            image.load()
             
             # 1. EXIF Metadata Analysis
-            exif_data = self._extract_exif(image_bytes)
+            exif_data = self._extract_exif(image_bytes, image)
             exif_signals = self._analyze_exif(exif_data)
             
             # 2. Image Properties Analysis
@@ -90,28 +349,93 @@ class ForensicAnalyzer:
                 }
             }
     
-    def _extract_exif(self, image_bytes: bytes) -> Dict:
-        """Extract EXIF metadata from image"""
+    def _extract_exif(self, image_bytes: bytes, image: Image.Image) -> Dict:
+        """Extract EXIF metadata from image (image is the already-opened image_bytes)"""
         try:
-            # Try exifread first
-            tags = exifread.process_file(io.BytesIO(image_bytes), details=False)
-            exif_dict = {str(tag): str(tags[tag]) for tag in tags.keys() if not tag.startswith('Thumbnail')}
+            # exifread only for formats with EXIF at a known offset near the start
+            # (JPEG APP1, TIFF header); PNG/WebP/GIF EXIF chunks may sit anywhere,
+            # so read those from the image PIL has already loaded
+            if not image_bytes.startswith(EXIFREAD_SIGNATURES):
+                return self._extract_pil_exif(image)
             
-            # Also try PIL
-            image = Image.open(io.BytesIO(image_bytes))
-            if hasattr(image, '_getexif') and image._getexif():
-                exif = image._getexif()
-                for tag_id, value in exif.items():
-                    tag = TAGS.get(tag_id, tag_id)
-                    if tag not in exif_dict:
-                        exif_dict[str(tag)] = str(value)
+            exif_source = image_bytes
+            if image_bytes.startswith(b'\xff\xd8'):
+                exif_end = self._find_jpeg_exif_end(image_bytes)
+                if exif_end == 0:
+                    return self._extract_pil_exif(image)  # No Exif APP1 segment
+                if exif_end is not None:
+                    # EXIF offsets are relative to APP1, so the prefix is enough
+                    exif_source = memoryview(image_bytes)[:exif_end]
             
-            return exif_dict
+            # Stop each IFD after the last tag we read and don't decode the
+            # embedded thumbnail
+            tags = exifread.process_file(
+                io.BytesIO(exif_source),
+                stop_tag=EXIF_STOP_TAG,
+                details=False,
+                extract_thumbnail=False
+            )
+            # exifread keys are already "IFD Name" strings; one items() pass
+            exif_dict = {
+                tag: value if isinstance(value, str) else str(value)
+                for tag, value in tags.items() if not tag.startswith('Thumbnail')
+            }
+            
+            # Fall back to PIL only when exifread found nothing
+            return exif_dict or self._extract_pil_exif(image)
             
         except Exception as e:
             logger.warning(f"EXIF extraction error: {str(e)}")
             return {}
     
+    @staticmethod
+    def _find_jpeg_exif_end(image_bytes: bytes) -> Optional[int]:
+        """
+        Walk JPEG marker segments up to the image data and locate the Exif APP1
+        
+        Returns:
+            End offset of the Exif APP1 segment, 0 if the JPEG has none, or
+            None if the marker structure couldn't be followed
+        """
+        pos, size = 2, len(image_bytes)
+        while pos + 4 <= size:
+            if image_bytes[pos] != 0xFF:
+                return None
+            marker = image_bytes[pos + 1]
+            if marker == 0xFF:  # Fill byte
+                pos += 1
+                continue
+            if marker in (0xD9, 0xDA):  # EOI / start of scan: no metadata follows
+                return 0
+            if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # Markers without a length
+                pos += 2
+                continue
+            end = pos + 2 + int.from_bytes(image_bytes[pos + 2:pos + 4], 'big')
+            if marker == 0xE1 and image_bytes[pos + 4:pos + 10] == b'Exif\x00\x00':
+                return end if end <= size else None
+            pos = end
+        return None
+    
+    def _extract_pil_exif(self, image: Image.Image) -> Dict:
+        """Read EXIF with PIL, named like exifread ('Image Make', 'EXIF ...', 'GPS ...')"""
+        exif = image.getexif()
+        if not exif:
+            return {}
+        
+        exif_dict = {
+            f"Image {TAGS.get(tag_id, tag_id)}": value if isinstance(value, str) else str(value)
+            for tag_id, value in exif.items()
+        }
+        exif_dict.update(
+            (f"EXIF {TAGS.get(tag_id, tag_id)}", value if isinstance(value, str) else str(value))
+            for tag_id, value in exif.get_ifd(EXIF_IFD_POINTER).items()
+        )
+        exif_dict.update(
+            (f"GPS {GPSTAGS.get(tag_id, tag_id)}", value if isinstance(value, str) else str(value))
+            for tag_id, value in exif.get_ifd(GPS_IFD_POINTER).items()
+        )
+        return exif_dict
+    
     def _analyze_exif(self, exif_data: Dict) -> Dict:
         """Analyze EXIF data for authenticity signals"""
         signals = {
@@ -129,44 +453,39 @@ class ForensicAnalyzer:
             signals['missing_expected_fields'].append('No EXIF data (common in AI-generated images)')
             return signals
         
+        # Each check is a handful of hash probes into exif_data, so there is
+        # no need to iterate over the (possibly hundreds of) tags themselves
+        
         # Check for camera information
-        camera_fields = ['Image Make', 'Image Model', 'EXIF LensModel', 'EXIF LensMake']
-        for field in camera_fields:
-            if field in exif_data:
-                signals['camera_info'] = f"{field}: {exif_data[field]}"
-                break
+        camera_field = next((field for field in EXIF_CAMERA_FIELDS if field in exif_data), None)
+        if camera_field:
+            signals['camera_info'] = f"{camera_field}: {exif_data[camera_field]}"
         
         # Check software field for AI generation indicators
-        software_fields = ['Image Software', 'Software', 'EXIF Software']
-        for field in software_fields:
+        for field in EXIF_SOFTWARE_FIELDS:
             if field in exif_data:
                 software_value = str(exif_data[field]).lower()
                 signals['software'] = exif_data[field]
                 
-                # Check for AI generation keywords
-                for keyword in self.ai_generation_keywords:
+                # Check for AI generation keywords (every keyword is reported,
+                # including ones nested in a longer match)
+                if not self._ai_keyword_re.search(software_value):
+                    continue
+                for keyword in self._ai_keywords_lc:
                     if keyword in software_value:
                         signals['ai_generation_indicators'].append(f"Software field contains '{keyword}'")
                         signals['suspicious_software'] = True
         
         # Check datetime
-        datetime_fields = ['Image DateTime', 'EXIF DateTimeOriginal', 'DateTime']
-        for field in datetime_fields:
-            if field in exif_data:
-                signals['datetime'] = exif_data[field]
-                break
+        datetime_field = next((field for field in EXIF_DATETIME_FIELDS if field in exif_data), None)
+        if datetime_field:
+            signals['datetime'] = exif_data[datetime_field]
         
         # Check GPS
-        gps_fields = ['GPS GPSLatitude', 'GPS GPSLongitude']
-        has_gps = any(field in exif_data for field in gps_fields)
-        if has_gps:
+        if any(field in exif_data for field in EXIF_GPS_FIELDS):
             signals['gps'] = 'Present'
         
-        # Expected fields for real camera photos
-        expected_fields = ['Image Make', 'Image Model', 'EXIF DateTimeOriginal', 'EXIF ExifVersion']
-        for field in expected_fields:
-            if field not in exif_data:
-                signals['missing_expected_fields'].append(field)
+        signals['missing_expected_fields'] = [field for field in EXIF_EXPECTED_FIELDS if field not in exif_data]
         
         return signals
     
@@ -180,7 +499,10 @@ class ForensicAnalyzer:
             'height': image.height,
             'aspect_ratio': round(image.width / image.height, 2) if image.height > 0 else 0,
             'has_transparency': image.mode in ('RGBA', 'LA', 'P'),
-            'info': {k: str(v) for k, v in image.info.items() if k not in ['exif', 'icc_profile']}
+            'info': {
+                k: str(v) if k in IMAGE_INFO_SCALAR_KEYS else f"<{type(v).__name__}>"
+                for k, v in image.info.items() if k not in ('exif', 'icc_profile')
+            }
         }
     
     def _analyze_compression(self, image: Image.Image, image_bytes: bytes) -> Dict:
@@ -189,31 +511,26 @@ class ForensicAnalyzer:
             'format': image.format,
             'file_size': len(image_bytes),
             'compression_ratio': 0.0,
-            're_encoding_detected': False,
             're_encoding_indicators': []
         }
         
         try:
             # Calculate compression ratio
-            uncompressed_size = image.width * image.height * len(image.mode)
+            bytes_per_pixel = BYTES_PER_PIXEL.get(image.mode) or len(image.getbands())
+            uncompressed_size = image.width * image.height * bytes_per_pixel
             signals['compression_ratio'] = round(len(image_bytes) / uncompressed_size, 4)
             
-            # Check for JPEG artifacts (multiple re-encoding)
-            if image.format == 'JPEG':
-                # Very low compression ratio suggests multiple re-encodings
-                if signals['compression_ratio'] < 0.05:
-                    signals['re_encoding_detected'] = True
-                    signals['re_encoding_indicators'].append('Unusually high compression (possible multiple re-encodings)')
+            # Judge JPEG re-encoding from the DQT tables Pillow already parsed
+            # from the header, not from file size: high-resolution photos
+            # compress well without ever being re-saved
+            quantization = getattr(image, 'quantization', None)
+            if image.format == 'JPEG' and quantization:
+                quality, standard = self._jpeg_table_quality(quantization)
+                signals['jpeg_quality'] = quality
+                signals['standard_quantization_tables'] = standard
                 
-                # Check quality from image info
-                if 'quality' in image.info:
-                    quality = image.info['quality']
-                    if quality < 75:
-                        signals['re_encoding_indicators'].append(f'Low JPEG quality ({quality}) suggests re-encoding')
-                
-                # Check for quantization tables
-                if 'quantization' in image.info:
-                    signals['re_encoding_indicators'].append('Non-standard quantization tables detected')
+                if quality < LOW_JPEG_QUALITY:
+                    signals['re_encoding_indicators'].append(f'Low JPEG quality (~{quality}) suggests re-encoding')
             
             # PNG should not have JPEG artifacts
             elif image.format == 'PNG':
@@ -226,6 +543,23 @@ class ForensicAnalyzer:
         
         return signals
     
+    @staticmethod
+    def _jpeg_table_quality(quantization: Dict[int, List[int]]) -> Tuple[int, bool]:
+        """
+        Estimated quality of a JPEG's quantization tables, and whether they are
+        exactly libjpeg's. Custom tables get the IJG quality whose luminance
+        table has the same total, the usual quality estimate.
+        """
+        luminance = tuple(quantization[min(quantization)])
+        chrominance = tuple(quantization.get(min(quantization) + 1, ()))
+        quality = _IJG_TABLE_QUALITY.get((luminance, chrominance))
+        if quality is not None:
+            return quality, True
+        
+        scale = 100 * sum(luminance) / sum(IJG_LUMINANCE_TABLE)
+        estimate = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+        return min(max(round(estimate), 1), 100), False
+    
     def _analyze_image_statistics(self, image: Image.Image) -> Dict:
         """Analyze statistical properties of image"""
         try:
@@ -233,29 +567,19 @@ class ForensicAnalyzer:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Get pixel data
-            pixels = list(image.getdata())
+            # Calculate channel statistics from Pillow's C histogram (768 bins)
+            # over every pixel: exact, tens of ms at 12 MP, and free of the
+            # aliasing a grid sample shows on stripes and checkerboards
+            histogram = np.asarray(image.histogram(), dtype=np.int64).reshape(3, 256)
+            means, std_devs = _histogram_moments(histogram)
             
-            # Sample pixels for efficiency (max 10000 pixels)
-            sample_size = min(10000, len(pixels))
-            import random
-            sampled_pixels = random.sample(pixels, sample_size)
-            
-            # Calculate channel statistics
-            r_values = [p[0] for p in sampled_pixels]
-            g_values = [p[1] for p in sampled_pixels]
-            b_values = [p[2] for p in sampled_pixels]
-            
-            def calc_stats(values):
-                mean = sum(values) / len(values)
-                variance = sum((x - mean) ** 2 for x in values) / len(values)
-                std_dev = variance ** 0.5
-                return {'mean': round(mean, 2), 'std_dev': round(std_dev, 2)}
+            def channel_stats(channel):
+                return {'mean': round(float(means[channel]), 2), 'std_dev': round(float(std_devs[channel]), 2)}
             
             stats = {
-                'red_channel': calc_stats(r_values),
-                'green_channel': calc_stats(g_values),
-                'blue_channel': calc_stats(b_values),
+                'red_channel': channel_stats(0),
+                'green_channel': channel_stats(1),
+                'blue_channel': channel_stats(2),
                 'uniformity_score': 0.0,
                 'suspicious_patterns': []
             }
@@ -277,6 +601,11 @@ class ForensicAnalyzer:
             logger.warning(f"Statistical analysis error: {str(e)}")
             return {'error': str(e)}
     
+    @staticmethod
+    def _dims_multiple_of(width: int, height: int, multiple: int) -> bool:
+        """Whether both (non-zero) dimensions are multiples of `multiple`"""
+        return bool(width and height) and width % multiple == 0 and height % multiple == 0
+    
     def _extract_forensic_indicators(self, exif_signals, properties, compression_signals, statistical_signals) -> Dict:
         """Extract clear forensic indicators from all signals"""
         indicators = {
@@ -314,11 +643,10 @@ class ForensicAnalyzer:
         # Check for AI-typical image dimensions (often multiples of 64 or 512)
         width = properties.get('width', 0)
         height = properties.get('height', 0)
-        if width > 0 and height > 0:
-            if width % 512 == 0 and height % 512 == 0:
-                indicators['ai_signals'].append(f"Dimensions ({width}x{height}) are multiples of 512 (typical of AI generators)")
-            elif width % 64 == 0 and height % 64 == 0 and width == height:
-                indicators['ai_signals'].append(f"Square dimensions ({width}x{height}) in multiples of 64 (typical of AI models)")
+        if self._dims_multiple_of(width, height, 512):
+            indicators['ai_signals'].append(f"Dimensions ({width}x{height}) are multiples of 512 (typical of AI generators)")
+        elif width == height and self._dims_multiple_of(width, height, 64):
+            indicators['ai_signals'].append(f"Square dimensions ({width}x{height}) in multiples of 64 (typical of AI models)")
         
         # Statistical anomalies
         if statistical_signals.get('suspicious_patterns'):
@@ -326,18 +654,23 @@ class ForensicAnalyzer:
                 indicators['ai_signals'].append(f"Statistical anomaly: {pattern}")
         
         # MANIPULATION SIGNALS (editing, re-encoding)
-        if compression_signals.get('re_encoding_detected'):
-            indicators['manipulation_signals'].append("Multiple re-encodings detected")
-        
         if compression_signals.get('re_encoding_indicators'):
             for indicator in compression_signals['re_encoding_indicators']:
                 indicators['manipulation_signals'].append(indicator)
         
         # PNG format but with very specific dimensions suggests export from editor
-        if properties.get('format') == 'PNG' and width % 8 == 0 and height % 8 == 0:
+        if properties.get('format') == 'PNG' and self._dims_multiple_of(width, height, 8):
             indicators['manipulation_signals'].append("PNG with editor-typical dimensions")
         
         # INCONCLUSIVE SIGNALS
+        # Scaled IJG tables come from editors and web tools as well as from
+        # much camera firmware, so they are reported without taking a side
+        if compression_signals.get('standard_quantization_tables'):
+            indicators['inconclusive_signals'].append(
+                f"Standard libjpeg quantization tables (quality {compression_signals['jpeg_quality']}): "
+                "used by both camera firmware and editing software"
+            )
+        
         if not indicators['human_signals'] and not indicators['ai_signals']:
             indicators['inconclusive_signals'].append("Insufficient forensic evidence to determine origin")
         
@@ -345,6 +678,10 @@ class ForensicAnalyzer:
     
     def analyze_video(self, video_bytes: bytes, filename: str = "video.mp4") -> Dict:
         """Analyze video for authenticity using forensic signals"""
+        return self._cached_analysis('video', video_bytes, self._analyze_video_uncached)
+    
+    def _analyze_video_uncached(self, video_bytes: bytes) -> Dict:
+        """Run the video analysis behind analyze_video"""
         if not VIDEO_AVAILABLE:
             return {
                 'media_type': 'video',
@@ -359,18 +696,18 @@ class ForensicAnalyzer:
         
         try:
             # Save temporarily for analysis
-            import tempfile
-            import os
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp:
-                tmp.write(video_bytes)
-                tmp_path = tmp.name
+            tmp_path = self._write_temp_media(video_bytes, '.mp4')
             
             try:
                 # Probe video metadata
-                probe = ffmpeg.probe(tmp_path)
+                result = subprocess.run([
+                    'ffprobe', '-v', 'quiet', '-print_format', 'json',
+                    '-show_entries', FFPROBE_ENTRIES, tmp_path
+                ], capture_output=True, check=True, timeout=30)
+                probe = json.loads(result.stdout)
                 
-                video_streams = [s for s in probe['streams'] if s['codec_type'] == 'video']
-                audio_streams = [s for s in probe['streams'] if s['codec_type'] == 'audio']
+                video_streams = [s for s in probe.get('streams', []) if s.get('codec_type') == 'video']
+                audio_streams = [s for s in probe.get('streams', []) if s.get('codec_type') == 'audio']
                 
                 signals = {
                     'media_type': 'video',
@@ -422,55 +759,6 @@ class ForensicAnalyzer:
     
     def _extract_video_forensic_indicators(self, signals: Dict) -> Dict:
         """Extract forensic indicators from video signals"""
-
-    def _extract_key_frames(self, video_path: str, duration: float, max_frames: int = 3) -> List[bytes]:
-        """Extract key frames from video for visual analysis"""
-        frames = []
-        
-        try:
-            # Extract frames at specific timestamps
-            timestamps = []
-            if duration > 0:
-                # Extract frames from beginning, middle, and end
-                timestamps = [
-                    duration * 0.1,   # 10% into video
-                    duration * 0.5,   # Middle
-                    duration * 0.9    # 90% into video
-                ]
-            else:
-                timestamps = [0, 1, 2]  # First 3 seconds
-            
-            import subprocess
-            import tempfile
-            import os
-            
-            for i, timestamp in enumerate(timestamps[:max_frames]):
-                with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_frame:
-                    frame_path = tmp_frame.name
-                
-                try:
-                    # Extract frame at timestamp
-                    subprocess.run([
-                        'ffmpeg', '-y', '-ss', str(timestamp), '-i', video_path,
-                        '-frames:v', '1', '-q:v', '2', frame_path
-                    ], capture_output=True, check=True, timeout=10)
-                    
-                    # Read frame data
-                    with open(frame_path, 'rb') as f:
-                        frame_data = f.read()
-                        frames.append(frame_data)
-                    
-                except Exception as frame_err:
-                    logger.warning(f"Failed to extract frame at {timestamp}s: {str(frame_err)}")
-                finally:
-                    if os.path.exists(frame_path):
-                        os.unlink(frame_path)
-            
-        except Exception as e:
-            logger.error(f"Frame extraction error: {str(e)}")
-        
-        return frames
-
         indicators = {
             'human_signals': [],
             'ai_signals': [],
@@ -482,7 +770,7 @@ class ForensicAnalyzer:
         metadata = signals.get('metadata', {})
         if metadata:
             # Check for camera/device info
-            if 'com.android.version' in metadata or 'com.apple.quicktime.make' in metadata:
+            if any(key in metadata for key in DEVICE_METADATA_KEYS):
                 indicators['human_signals'].append("Device metadata present (mobile device recording)")
             
             if 'creation_time' in metadata:
@@ -492,39 +780,32 @@ class ForensicAnalyzer:
         codec = signals.get('video_codec')
         profile = signals.get('video_profile')
         
-        if codec == 'h264' and profile in ['High', 'Main']:
+        if codec == 'h264' and profile in CAMERA_H264_PROFILES:
             indicators['human_signals'].append(f"Standard camera codec (H.264 {profile})")
         elif codec == 'hevc':
             indicators['human_signals'].append("Modern camera codec (HEVC/H.265)")
         
         # Check frame rate
         frame_rate = signals.get('frame_rate', '')
-        if frame_rate:
-            # Parse frame rate
-            if '/' in frame_rate:
-                num, denom = frame_rate.split('/')
-                fps = float(num) / float(denom)
-                
-                # Standard camera frame rates
-                if fps in [24, 25, 30, 60, 120]:
-                    indicators['human_signals'].append(f"Standard camera frame rate ({fps} fps)")
-                elif fps < 20 or fps > 120:
-                    indicators['ai_signals'].append(f"Unusual frame rate ({fps} fps) - uncommon for real cameras")
+        # Streams with an unknown rate ('0/0') say nothing either way
+        fps = _parse_frame_rate(frame_rate) if frame_rate else 0.0
+        if fps > 0:
+            # Standard camera frame rates, including 29.97/59.94 NTSC timing
+            if _is_standard_frame_rate(fps):
+                indicators['human_signals'].append(f"Standard camera frame rate ({round(fps, 2)} fps)")
+            elif fps < 20 or fps > 120:
+                indicators['ai_signals'].append(f"Unusual frame rate ({round(fps, 2)} fps) - uncommon for real cameras")
         
         # Check resolution
         width = signals.get('width')
         height = signals.get('height')
         if width and height:
             # Check for AI-typical dimensions
-            if width % 256 == 0 and height % 256 == 0:
+            if self._dims_multiple_of(width, height, 256):
                 indicators['ai_signals'].append(f"Dimensions ({width}x{height}) are multiples of 256 (typical of AI video generators)")
             
             # Standard camera resolutions
-            standard_resolutions = [
-                (1920, 1080), (1280, 720), (3840, 2160), (2560, 1440),
-                (720, 480), (1080, 1920)  # including portrait
-            ]
-            if (width, height) in standard_resolutions:
+            if (width, height) in STANDARD_VIDEO_RESOLUTIONS:
                 indicators['human_signals'].append(f"Standard camera resolution ({width}x{height})")
         
         # Check for audio
@@ -549,8 +830,58 @@ class ForensicAnalyzer:
         
         return indicators
     
+    def _extract_key_frames(self, video_path: str, duration: float, max_frames: int = 3) -> List[bytes]:
+        """Extract key frames from video for visual analysis"""
+        frames = []
+        
+        try:
+            # Extract frames at specific timestamps
+            timestamps = []
+            if duration > 0:
+                # Extract frames from beginning, middle, and end
+                timestamps = [
+                    duration * 0.1,   # 10% into video
+                    duration * 0.5,   # Middle
+                    duration * 0.9    # 90% into video
+                ]
+            else:
+                timestamps = [0, 1, 2]  # First 3 seconds
+            timestamps = timestamps[:max_frames]
+            
+            # One ffmpeg process for all frames: each timestamp is a separately
+            # fast-seeked input (-ss before -i), trimmed to its first frame, and
+            # the frames are concatenated into one MJPEG stream on stdout
+            command = ['ffmpeg', '-loglevel', 'error']
+            for timestamp in timestamps:
+                command += ['-ss', str(timestamp), '-i', video_path]
+            filters = ''.join(
+                f"[{i}:v:0]trim=end_frame=1[f{i}];" for i in range(len(timestamps))
+            )
+            filters += ''.join(f"[f{i}]" for i in range(len(timestamps)))
+            filters += f"concat=n={len(timestamps)}:v=1:a=0,setpts=N[frames]"
+            
+            result = subprocess.run(command + [
+                '-filter_complex', filters, '-map', '[frames]', '-vsync', '0',
+                '-f', 'image2pipe', '-vcodec', 'mjpeg', '-q:v', '2', '-'
+            ], capture_output=True, timeout=10 * len(timestamps))
+            if result.returncode != 0:
+                logger.warning(f"Failed to extract frames at {timestamps}: {result.stderr.decode(errors='replace').strip()}")
+            
+            # Split the piped stream on the JPEG end-of-image marker; the
+            # MJPEG encoder byte-stuffs 0xFF in scan data, so it only occurs there
+            frames = [frame + b'\xff\xd9' for frame in result.stdout.split(b'\xff\xd9') if frame]
+            
+        except Exception as e:
+            logger.error(f"Frame extraction error: {str(e)}")
+        
+        return frames
+    
     def analyze_audio(self, audio_bytes: bytes, filename: str = "audio.mp3") -> Dict:
         """Analyze audio for authenticity using forensic signals"""
+        return self._cached_analysis('audio', audio_bytes, self._analyze_audio_uncached)
+    
+    def _analyze_audio_uncached(self, audio_bytes: bytes) -> Dict:
+        """Run the audio analysis behind analyze_audio"""
         if not AUDIO_AVAILABLE:
             return {
                 'media_type': 'audio',
@@ -564,29 +895,51 @@ class ForensicAnalyzer:
             }
         
         try:
-            # Save temporarily for analysis
-            import tempfile
-            import os
+            librosa, sf, MutagenFile = _audio_modules()
             
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
+            # Read straight from memory when libsndfile knows the format; other
+            # codecs (e.g. MP3 on libsndfile < 1.1) need a file path for audioread
+            tmp_path = None
+            try:
+                stream_info = sf.info(io.BytesIO(audio_bytes))
+            except Exception:
+                stream_info = None
+                tmp_path = self._write_temp_media(audio_bytes, '.mp3')
             
             try:
                 # Extract metadata using mutagen
-                audio_file = MutagenFile(tmp_path)
+                audio_file = MutagenFile(tmp_path or io.BytesIO(audio_bytes))
                 metadata = {}
                 if audio_file and audio_file.tags:
                     metadata = {k: str(v) for k, v in audio_file.tags.items()}
                 
-                # Load audio for analysis
-                y, sr = librosa.load(tmp_path, sr=None)
+                # Stream properties come from the header; formats libsndfile
+                # can't read fall back to mutagen's stream info
+                if stream_info is not None:
+                    sample_rate, duration, channels = stream_info.samplerate, stream_info.duration, stream_info.channels
+                else:
+                    info = audio_file.info if audio_file else None
+                    sample_rate = getattr(info, 'sample_rate', None)
+                    duration = getattr(info, 'length', None)
+                    channels = getattr(info, 'channels', None)
+                
+                # Decode only the analysis window, not the whole recording, as
+                # float32 mono. Formats libsndfile reads skip librosa's loader
+                # and go to soundfile directly
+                if stream_info is not None:
+                    with sf.SoundFile(io.BytesIO(audio_bytes)) as sound:
+                        sr = sound.samplerate
+                        y = sound.read(frames=round(AUDIO_ANALYSIS_WINDOW * sr), dtype='float32')
+                    if y.ndim == 2:
+                        y = y.mean(axis=1, dtype=np.float32)
+                else:
+                    y, sr = librosa.load(tmp_path, sr=None, mono=True, duration=AUDIO_ANALYSIS_WINDOW)
                 
                 signals = {
                     'media_type': 'audio',
-                    'sample_rate': sr,
-                    'duration': float(len(y)) / sr,
-                    'channels': 1 if len(y.shape) == 1 else y.shape[0],
+                    'sample_rate': sample_rate or sr,
+                    'duration': float(duration) if duration else float(len(y)) / sr,
+                    'channels': channels or 1,
                     'metadata': metadata,
                     'encoding': None
                 }
@@ -602,7 +955,8 @@ class ForensicAnalyzer:
                 return signals
                 
             finally:
-                os.unlink(tmp_path)
+                if tmp_path:
+                    os.unlink(tmp_path)
                 
         except Exception as e:
             logger.error(f"Audio analysis error: {str(e)}")
@@ -620,39 +974,53 @@ class ForensicAnalyzer:
     def _analyze_audio_properties(self, y: np.ndarray, sr: int) -> Dict:
         """Analyze audio signal properties"""
         try:
-            properties = {}
-            
-            # Pitch analysis
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
-            
-            if pitch_values:
+            librosa = _audio_modules().librosa
+            
+            # Callers decode at most AUDIO_ANALYSIS_WINDOW seconds; recorded so
+            # readers know the statistics don't cover longer clips in full
+            properties = {'analyzed_seconds': round(len(y) / sr, 2)}
+            
+            # Energy and spectral analysis, on the GPU when one is available
+            rms = spectral_centroids = None
+            if _gpu_torch() is not None:
+                try:
+                    rms, spectral_centroids = self._gpu_energy_and_centroid(y, sr, hop_length=AUDIO_HOP_LENGTH)
+                except Exception as gpu_err:
+                    logger.warning(f"GPU audio features failed, using CPU: {str(gpu_err)}")
+            if rms is None:
+                rms = librosa.feature.rms(y=y, hop_length=AUDIO_HOP_LENGTH)[0]
+                spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr, hop_length=AUDIO_HOP_LENGTH)[0]
+            
+            # Silence detection reuses the RMS frames: librosa.effects.split
+            # would compute the same framed RMS again before thresholding it
+            non_silent = self._non_silent_frames(rms)
+            intervals = self._nonsilent_intervals(non_silent, AUDIO_HOP_LENGTH, len(y))
+            silence_duration = len(y) - int(np.sum(intervals[:, 1] - intervals[:, 0]))
+            properties['silence_ratio'] = float(silence_duration / len(y))
+            properties['speech_segments'] = len(intervals)
+            
+            # Pitch analysis: one fundamental frequency estimate per RMS frame.
+            # yin makes no voicing decision and returns an arbitrary in-range
+            # f0 for silence, so only frames above the silence threshold count
+            f0 = librosa.yin(
+                y, fmin=PITCH_FMIN, fmax=PITCH_FMAX, sr=sr,
+                frame_length=self._pitch_frame_length(sr), hop_length=AUDIO_HOP_LENGTH
+            )
+            pitch_values = self._voiced_pitch(f0, non_silent)
+            
+            if pitch_values.size:
+                # np.std is the square root of np.var, so take the variance once
+                pitch_variance = float(np.var(pitch_values))
                 properties['pitch_mean'] = float(np.mean(pitch_values))
-                properties['pitch_std'] = float(np.std(pitch_values))
-                properties['pitch_variance'] = float(np.var(pitch_values))
+                properties['pitch_std'] = pitch_variance ** 0.5
+                properties['pitch_variance'] = pitch_variance
             else:
                 properties['pitch_mean'] = 0
                 properties['pitch_std'] = 0
                 properties['pitch_variance'] = 0
             
-            # Silence detection
-            intervals = librosa.effects.split(y, top_db=30)
-            silence_duration = len(y) - sum(interval[1] - interval[0] for interval in intervals)
-            properties['silence_ratio'] = float(silence_duration / len(y))
-            properties['speech_segments'] = len(intervals)
-            
-            # Energy analysis
-            rms = librosa.feature.rms(y=y)[0]
             properties['energy_mean'] = float(np.mean(rms))
             properties['energy_std'] = float(np.std(rms))
-            
-            # Spectral analysis
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
             properties['spectral_centroid_mean'] = float(np.mean(spectral_centroids))
             properties['spectral_centroid_std'] = float(np.std(spectral_centroids))
             
@@ -662,6 +1030,71 @@ class ForensicAnalyzer:
             logger.warning(f"Audio properties analysis error: {str(e)}")
             return {}
     
+    @staticmethod
+    def _pitch_frame_length(sr: int) -> int:
+        """
+        yin frame length for a sample rate: librosa's 2048 default, or the
+        next power of two that still fits a PITCH_FMIN period in half a frame
+        (the default raises above ~164 kHz and degrades at 88.2/96 kHz)
+        """
+        needed = 2 * sr / PITCH_FMIN + 2
+        return max(2048, 1 << int(np.ceil(np.log2(needed))))
+    
+    @staticmethod
+    def _non_silent_frames(rms: np.ndarray) -> np.ndarray:
+        """
+        Frames within SILENCE_TOP_DB of the loudest, compared in amplitude
+        as librosa.amplitude_to_db(rms, ref=np.max) does in dB (amin 1e-5)
+        """
+        threshold = max(float(rms.max()), 1e-5) * 10.0 ** (-SILENCE_TOP_DB / 20)
+        return np.maximum(rms, 1e-5) > threshold
+    
+    @staticmethod
+    def _voiced_pitch(f0: np.ndarray, non_silent: np.ndarray) -> np.ndarray:
+        """Valid f0 estimates from non-silent frames; both are per-hop frame arrays"""
+        frames = min(len(f0), len(non_silent))
+        f0 = f0[:frames]
+        return f0[non_silent[:frames] & np.isfinite(f0) & (f0 > 0)]
+    
+    @staticmethod
+    def _nonsilent_intervals(non_silent: np.ndarray, hop_length: int, num_samples: int) -> np.ndarray:
+        """
+        Non-silent [start, end) sample intervals from the per-frame mask of
+        _non_silent_frames, as librosa.effects.split derives them
+        """
+        edges = [np.flatnonzero(np.diff(non_silent.astype(int))) + 1]
+        if non_silent[0]:
+            edges.insert(0, [0])
+        if non_silent[-1]:
+            edges.append([len(non_silent)])
+        edges = np.minimum(np.concatenate(edges) * hop_length, num_samples)
+        return edges.reshape((-1, 2))
+    
+    @staticmethod
+    def _gpu_energy_and_centroid(y: np.ndarray, sr: int, n_fft: int = 2048, hop_length: int = 512) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-frame RMS and spectral centroid on CUDA, framed like librosa's
+        defaults (centered, zero-padded, Hann window) so values match the CPU path
+        """
+        torch = _gpu_torch()
+        with torch.no_grad():
+            signal = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).cuda()
+            
+            # Time-domain RMS over the same frames librosa.feature.rms uses
+            frames = torch.nn.functional.pad(signal, (n_fft // 2, n_fft // 2)).unfold(0, n_fft, hop_length)
+            rms = frames.pow(2).mean(dim=1).sqrt()
+            
+            # Magnitude-weighted mean frequency per frame; silent frames give 0
+            magnitude = torch.stft(
+                signal, n_fft=n_fft, hop_length=hop_length,
+                window=torch.hann_window(n_fft, device=signal.device),
+                center=True, pad_mode='constant', return_complex=True
+            ).abs()
+            freqs = torch.fft.rfftfreq(n_fft, d=1.0 / sr, device=signal.device)
+            centroid = (freqs[:, None] * magnitude).sum(dim=0) / magnitude.sum(dim=0).clamp_min(torch.finfo(magnitude.dtype).tiny)
+            
+            return rms.cpu().numpy(), centroid.cpu().numpy()
+    
     def _extract_audio_forensic_indicators(self, signals: Dict, metadata: Dict) -> Dict:
         """Extract forensic indicators from audio signals"""
         indicators = {
@@ -700,9 +1133,9 @@ class ForensicAnalyzer:
         
         # Sample rate check
         sr = signals.get('sample_rate', 0)
-        if sr in [44100, 48000]:
+        if sr in STANDARD_RECORDING_SAMPLE_RATES:
             indicators['human_signals'].append(f"Standard recording sample rate ({sr} Hz)")
-        elif sr in [16000, 22050]:
+        elif sr in TTS_SAMPLE_RATES:
             indicators['ai_signals'].append(f"Low sample rate ({sr} Hz) - typical of TTS/AI audio")
         
         # Duration check
@@ -714,149 +1147,3 @@ class ForensicAnalyzer:
             indicators['inconclusive_signals'].append("Insufficient audio forensic evidence")
         
         return indicators
-
-
-def fuse_evidence(forensic_analysis: Dict, ai_analysis: Dict) -> Tuple[str, str, str, List[str]]:
-    """
-    Fuse forensic evidence with AI opinion using IMPROVED strict rules.
-    
-    Enhanced Rules for Better Accuracy:
-    1. ≥3 AI indicators OR (≥2 AI + AI opinion agrees) → Likely AI-Generated
-    2. ≥3 Human signals OR (≥2 Human + no AI signals) → Likely Original
-    3. Human + manipulation → Hybrid / Manipulated
-    4. Weighted scoring system for better confidence levels
-    5. AI opinion only used as tiebreaker
-    
-    Returns:
-        (classification, confidence, reason, all_indicators)
-    """
-    
-    forensic_indicators = forensic_analysis.get('forensic_indicators', {})
-    human_signals = forensic_indicators.get('human_signals', [])
-    ai_signals = forensic_indicators.get('ai_signals', [])
-    manipulation_signals = forensic_indicators.get('manipulation_signals', [])
-    inconclusive_signals = forensic_indicators.get('inconclusive_signals', [])
-    
-    # Extract AI opinion indicators
-    ai_opinion = ai_analysis.get('origin', {})
-    ai_classification = ai_opinion.get('classification', 'Unclear / Mixed Signals')
-    ai_confidence = ai_opinion.get('confidence', 'low')
-    ai_indicators = ai_analysis.get('ai_signals', [])
-    human_opinion_signals = ai_analysis.get('human_signals', [])
-    
-    # Combine all indicators for final report
-    all_indicators = (
-        [f"[FORENSIC] {s}" for s in human_signals] +
-        [f"[FORENSIC AI] {s}" for s in ai_signals] +
-        [f"[FORENSIC EDIT] {s}" for s in manipulation_signals] +
-        [f"[AI OPINION] {s}" for s in ai_indicators[:3]]  # Include more AI opinion signals
-    )
-    
-    # Evidence counts
-    num_human = len(human_signals)
-    num_ai = len(ai_signals)
-    num_manipulation = len(manipulation_signals)
-    num_inconclusive = len(inconclusive_signals)
-    
-    # Calculate total evidence score with weighted importance
-    total_evidence = num_human + num_ai + num_manipulation
-    
-    # Check if AI opinion agrees with forensics (for stronger confidence)
-    ai_agrees_ai_generated = 'likely ai' in ai_classification.lower() or 'ai-generated' in ai_classification.lower()
-    ai_agrees_original = 'likely original' in ai_classification.lower() or 'likely human' in ai_classification.lower()
-    ai_opinion_strong = ai_confidence in ['high', 'medium']
-    
-    # RULE 1: Strong AI-Generated Evidence
-    # Need at least 2 AI signals, or 1 strong signal + AI opinion agreement
-    if num_ai >= 3 and num_human == 0:
-        confidence = 'high'
-        reason = f"Strong forensic evidence: {num_ai} AI generation indicators detected with no authentic signals"
-        return "Likely AI-Generated", confidence, reason, all_indicators
-    elif num_ai >= 2 and num_human == 0:
-        if ai_agrees_ai_generated and ai_opinion_strong:
-            confidence = 'high'
-            reason = f"Forensic analysis ({num_ai} AI indicators) strongly supported by AI opinion analysis"
-        else:
-            confidence = 'medium'
-            reason = f"Forensic analysis detected {num_ai} AI generation indicators with no human capture signals"
-        return "Likely AI-Generated", confidence, reason, all_indicators
-    elif num_ai >= 1 and num_human == 0 and ai_agrees_ai_generated and ai_opinion_strong:
-        confidence = 'medium'
-        reason = f"Forensic AI indicator combined with strong AI opinion suggests synthetic content"
-        return "Likely AI-Generated", confidence, reason, all_indicators
-    
-    # RULE 2: Strong Human/Original Evidence
-    # Need at least 2 human signals, or strong metadata + no AI signals
-    if num_human >= 3 and num_ai == 0:
-        confidence = 'high'
-        reason = f"Strong authenticity: {num_human} genuine capture signals with no AI indicators"
-        return "Likely Original", confidence, reason, all_indicators
-    elif num_human >= 2 and num_ai == 0:
-        if ai_agrees_original and ai_opinion_strong:
-            confidence = 'high'
-            reason = f"Forensic authenticity ({num_human} signals) confirmed by AI visual analysis"
-        else:
-            confidence = 'medium'
-            reason = f"Forensic analysis detected {num_human} authentic capture signals with no AI indicators"
-        return "Likely Original", confidence, reason, all_indicators
-    elif num_human >= 1 and num_ai == 0 and ai_agrees_original and ai_opinion_strong:
-        confidence = 'medium'
-        reason = f"Authentic metadata combined with AI opinion suggests original content"
-        return "Likely Original", confidence, reason, all_indicators
-    
-    # RULE 3: Hybrid / Manipulated (human source + editing/manipulation)
-    if num_human >= 1 and num_manipulation >= 2:
-        confidence = 'high' if num_manipulation >= 3 else 'medium'
-        reason = f"Original content detected with {num_manipulation} manipulation indicators (edited/processed)"
-        return "Hybrid / Manipulated", confidence, reason, all_indicators
-    elif num_human >= 1 and num_manipulation >= 1:
-        confidence = 'medium'
-        reason = f"Authentic source with editing artifacts detected"
-        return "Hybrid / Manipulated", confidence, reason, all_indicators
-    
-    # RULE 4: Conflicting Evidence - be more nuanced
-    if num_human >= 1 and num_ai >= 1:
-        # Use AI opinion as tiebreaker
-        if num_ai > num_human and ai_agrees_ai_generated:
-            confidence = 'low'
-            reason = f"Mixed signals: {num_ai} AI vs {num_human} human indicators, leaning AI-generated"
-            return "Likely AI-Generated", confidence, reason, all_indicators
-        elif num_human > num_ai and ai_agrees_original:
-            confidence = 'low'
-            reason = f"Mixed signals: {num_human} human vs {num_ai} AI indicators, leaning original"
-            return "Likely Original", confidence, reason, all_indicators
-        else:
-            confidence = 'low'
-            reason = f"Conflicting evidence: {num_human} human signals vs {num_ai} AI indicators"
-            return "Unclear / Mixed Signals", confidence, reason, all_indicators
-    
-    # RULE 5: Single strong indicator with AI opinion support
-    if total_evidence >= 1 and total_evidence < 2:
-        if num_ai == 1 and ai_agrees_ai_generated and ai_opinion_strong:
-            confidence = 'low'
-            reason = f"Limited forensic evidence supported by AI opinion suggests synthetic content"
-            return "Likely AI-Generated", confidence, reason, all_indicators
-        elif num_human == 1 and ai_agrees_original and ai_opinion_strong:
-            confidence = 'low'
-            reason = f"Limited forensic evidence supported by AI opinion suggests original content"
-            return "Likely Original", confidence, reason, all_indicators
-    
-    # RULE 6: Insufficient evidence - use AI opinion as weak signal
-    if total_evidence < 1 or num_inconclusive > 0:
-        confidence = 'low'
-        
-        # Check AI opinion only if we have insufficient forensic evidence
-        if ai_agrees_ai_generated and ai_opinion_strong:
-            reason = f"No forensic evidence available; AI opinion suggests synthetic content (weak signal)"
-            return "Unclear / Mixed Signals", confidence, reason, all_indicators
-        elif ai_agrees_original and ai_opinion_strong:
-            reason = f"No forensic evidence available; AI opinion suggests original content (weak signal)"
-            return "Unclear / Mixed Signals", confidence, reason, all_indicators
-        
-        reason = f"Insufficient evidence for classification ({total_evidence} indicators detected)"
-        return "Inconclusive", confidence, reason, all_indicators
-    
-    # Default: Inconclusive
-    confidence = 'low'
-    reason = "Evidence pattern does not match classification rules"
-    return "Inconclusive", confidence, reason, all_indicators
@@ -9,6 +9,8 @@ import zipfile
 import io
 import json
 
+from analytics_trends import remove_daily_trends
+
 logger = logging.getLogger(__name__)
 
 
@@ -133,7 +135,8 @@ This data export is provided in compliance with GDPR Article 15 (Right of Access
             )
             deleted_counts["user_profile"] = result.modified_count
             
-            # 2. Delete analysis reports
+            # 2. Delete analysis reports, and their share of the daily trends
+            await remove_daily_trends(self.db, {"user_id": user_id})
             result = await self.db.analysis_reports.delete_many({"user_id": user_id})
             deleted_counts["analyses"] = result.deleted_count
             
@@ -220,10 +223,12 @@ This data export is provided in compliance with GDPR Article 15 (Right of Access
         deleted_counts = {}
         
         # Delete old analysis reports (except for premium/enterprise users)
-        result = await self.db.analysis_reports.delete_many({
-            "timestamp": {"$lt": cutoff_date.isoformat()},
+        old_analyses = {
+            "timestamp": {"$lt": cutoff_date},
             "user_id": {"$exists": True}  # Only for non-anonymous analyses
-        })
+        }
+        await remove_daily_trends(self.db, old_analyses)
+        result = await self.db.analysis_reports.delete_many(old_analyses)
         deleted_counts["old_analyses"] = result.deleted_count
         
         # Delete old audit logs (keep security events)
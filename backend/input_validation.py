@@ -3,13 +3,14 @@ Input Validation & Security Hardening
 Phase 1 Critical Fix: Prevent DoS attacks, memory exhaustion, malicious uploads
 """
 from fastapi import HTTPException, UploadFile
-from typing import Optional, Tuple
+from typing import Collection, Optional, Tuple
 import logging
 import re
 
 from config import (
     MAX_FILE_SIZE, MAX_TEXT_LENGTH, MAX_BATCH_SIZE,
     ALLOWED_IMAGE_TYPES, ALLOWED_VIDEO_TYPES, ALLOWED_AUDIO_TYPES,
+    MAGIC_BYTES_HEADER_SIZE,
     validate_file_size, validate_text_length, validate_mime_type, validate_magic_bytes
 )
 
@@ -46,7 +47,7 @@ def sanitize_filename(filename: str) -> str:
 
 async def validate_file_upload(
     file: UploadFile,
-    allowed_types: list = None,
+    allowed_types: Optional[Collection[str]] = None,
     max_size: int = MAX_FILE_SIZE
 ) -> Tuple[bytes, str, str]:
     """
@@ -54,7 +55,7 @@ async def validate_file_upload(
     
     Args:
         file: Uploaded file object
-        allowed_types: List of allowed MIME types (None = all)
+        allowed_types: Allowed MIME types, e.g. ALLOWED_IMAGE_TYPES (None = all)
         max_size: Maximum file size in bytes
     
     Returns:
@@ -69,13 +70,13 @@ async def validate_file_upload(
     
     filename = sanitize_filename(file.filename)
     
-    # 2. Validate MIME type
-    content_type = file.content_type or "application/octet-stream"
+    # 2. Validate MIME type (normalized to lowercase once, here at the boundary)
+    content_type = (file.content_type or "application/octet-stream").lower()
     
     if allowed_types and content_type not in allowed_types:
         raise ValidationError(
             f"Invalid file type: {content_type}. "
-            f"Allowed types: {', '.join(allowed_types)}"
+            f"Allowed types: {', '.join(sorted(allowed_types))}"
         )
     
     # 3. Read file with size limit
@@ -100,7 +101,7 @@ async def validate_file_upload(
     # 5. Validate magic bytes (prevent MIME type spoofing)
     if content_type.startswith('image/'):
         file_type = content_type.split('/')[-1]
-        if not validate_magic_bytes(file_bytes, file_type):
+        if not validate_magic_bytes(memoryview(file_bytes)[:MAGIC_BYTES_HEADER_SIZE], file_type):
             logger.warning(f"Magic bytes validation failed for {filename}")
             raise ValidationError(
                 f"File content doesn't match declared type: {content_type}"
@@ -1,19 +1,33 @@
 """
 Password Hashing & Validation Utilities
-Using bcrypt for secure password storage
+Using Argon2id for secure password storage (legacy bcrypt hashes are still verified)
 """
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 import secrets
 import string
 from typing import Tuple, List
 import logging
 
+from config import ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+
 logger = logging.getLogger(__name__)
 
+# Argon2id hasher shared by all hash/verify calls
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+
+# Prefix of hashes written by bcrypt ($2a$, $2b$, $2y$)
+_BCRYPT_PREFIX = '$2'
+
 
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt
+    Hash a password using Argon2id
     
     Args:
         password: Plain text password
@@ -21,10 +35,7 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password string
     """
-    # Generate salt and hash password
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    return _password_hasher.hash(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
@@ -39,15 +50,33 @@ def verify_password(password: str, hashed_password: str) -> bool:
         True if password matches, False otherwise
     """
     try:
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            hashed_password.encode('utf-8')
-        )
+        if hashed_password.startswith(_BCRYPT_PREFIX):
+            return bcrypt.checkpw(
+                password.encode('utf-8'),
+                hashed_password.encode('utf-8')
+            )
+        return _password_hasher.verify(hashed_password, password)
+    except (VerificationError, InvalidHashError):
+        return False
     except Exception as e:
         logger.error(f"Password verification error: {str(e)}")
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash should be replaced after a successful login
+    
+    True for legacy bcrypt hashes and for Argon2 hashes made with older parameters.
+    """
+    if hashed_password.startswith(_BCRYPT_PREFIX):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return False
+
+
 def generate_secure_token(length: int = 32) -> str:
     """
     Generate a cryptographically secure random token
@@ -49,7 +49,7 @@ from models import (
 from auth_jwt import JWTManager, get_current_user, get_optional_user, require_role
 from password_utils import hash_password, verify_password, validate_password_strength
 from audit_logger import AuditLogger
-from encryption import encryption_manager, encrypt_sensitive_fields, decrypt_sensitive_fields
+from encryption import encryption_manager, encrypt_sensitive_fields, decrypt_sensitive_fields, init_default_encryption
 from gdpr_compliance import GDPRManager
 
 ROOT_DIR = Path(__file__).parent
@@ -72,7 +72,6 @@ logger.info("✅ Phase 1: Advanced forensics and ML models loaded")
 
 # Initialize cache manager
 cache_manager = CacheManager(
-    redis_url=os.environ.get('REDIS_URL', 'redis://localhost:6379'),
     ttl=int(os.environ.get('CACHE_TTL', 86400))  # 24 hours default
 )
 
@@ -166,6 +165,8 @@ async def create_indexes():
 # Schedule index creation at startup
 @app.on_event("startup")
 async def startup_event():
+    # Fail fast on a missing ENCRYPTION_KEY in production
+    init_default_encryption()
     await create_indexes()
     logger.info("🚀 VeriSure API started with enhanced security")
 
@@ -393,6 +394,23 @@ def compute_content_hash(content: bytes) -> str:
     """Compute SHA-256 hash of content"""
     return hashlib.sha256(content).hexdigest()
 
+def report_to_storage(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a report for MongoDB, storing `timestamp` as a native BSON date"""
+    document = report.copy()
+    timestamp = document.get("timestamp")
+    if isinstance(timestamp, str):
+        document["timestamp"] = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return document
+
+def report_from_storage(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore the ISO-8601 `timestamp` string on a report read from MongoDB"""
+    timestamp = document.get("timestamp")
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        document["timestamp"] = timestamp.isoformat()
+    return document
+
 def extract_text_from_image(image_bytes: bytes) -> str:
     """Extract text from image using OCR"""
     try:
@@ -1062,7 +1080,8 @@ async def analyze_content(
         cache_manager.cache_analysis(content_hash, report_dict)
         
         # Store report in database (MongoDB will add _id)
-        await db.analysis_reports.insert_one(report_dict.copy())
+        await db.analysis_reports.insert_one(report_to_storage(report_dict))
+        await record_daily_trend(db, report_dict)
         
         return report
         
@@ -1077,7 +1096,7 @@ async def get_report(request: Request, report_id: str):
     report = await db.analysis_reports.find_one({"report_id": report_id}, {"_id": 0})
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    return report
+    return report_from_storage(report)
 
 # ========== NEW ENDPOINTS - QUICK WINS ==========
 
@@ -1108,7 +1127,7 @@ async def get_analysis_history(
             {"_id": 0}
         ).sort("timestamp", -1).skip(skip).limit(limit)
         
-        reports = await cursor.to_list(length=limit)
+        reports = [report_from_storage(r) for r in await cursor.to_list(length=limit)]
         
         return {
             "total": total,
@@ -1134,7 +1153,7 @@ async def export_pdf_report(request: Request, report_id: str):
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Generate PDF
-        pdf_buffer = pdf_generator.generate_report(report)
+        pdf_buffer = pdf_generator.generate_report(report_from_storage(report))
         
         # Return as streaming response
         headers = {
@@ -1216,7 +1235,7 @@ async def get_analytics_summary(request: Request):
         
         # Get recent analyses (last 24 hours)
         from datetime import timedelta
-        yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
         recent_count = await db.analysis_reports.count_documents(
             {"timestamp": {"$gte": yesterday}}
         )
@@ -1323,7 +1342,7 @@ async def compare_reports(
         for report_id in report_ids:
             report = await db.analysis_reports.find_one({"report_id": report_id}, {"_id": 0})
             if report:
-                reports.append(report)
+                reports.append(report_from_storage(report))
             else:
                 not_found.append(report_id)
         
@@ -1741,7 +1760,8 @@ async def analyze_batch(
                     cache_manager.cache_analysis(content_hash, report)
                     
                     # Store in database
-                    await db.analysis_reports.insert_one(report.copy())
+                    await db.analysis_reports.insert_one(report_to_storage(report))
+                    await record_daily_trend(db, report)
                     
                     batch_results.append({
                         "file_index": idx,
@@ -2158,6 +2178,7 @@ app.include_router(whatsapp_router, prefix="/api")
 
 # Phase 6: Include authentication and security routers
 from auth_routes import auth_router, user_router, admin_router
+from analytics_trends import record_daily_trend, backfill_daily_trends
 app.include_router(auth_router, prefix="/api")
 app.include_router(user_router, prefix="/api")
 app.include_router(admin_router, prefix="/api")
@@ -2179,6 +2200,36 @@ async def startup_db_optimization():
     logger.info("🚀 Starting database optimization...")
     
     try:
+        # Migrate legacy ISO-string timestamps to BSON dates (no-op once migrated)
+        migrated = await db.analysis_reports.update_many(
+            {"timestamp": {"$type": "string"}},
+            [{"$set": {"timestamp": {"$dateFromString": {"dateString": "$timestamp", "onError": "$timestamp"}}}}]
+        )
+        if migrated.modified_count:
+            logger.info(f"✅ Migrated {migrated.modified_count} report timestamps to BSON dates")
+        
+        # Strings that don't parse would never match the datetime range queries
+        # (retention purges, overview counts): fall back to the insertion time
+        # in the ObjectId _id, keeping the original text in timestamp_raw
+        fallback = await db.analysis_reports.update_many(
+            {"timestamp": {"$type": "string"}},
+            [{"$set": {
+                "timestamp_raw": "$timestamp",
+                "timestamp": {"$convert": {"input": "$_id", "to": "date", "onError": "$timestamp"}}
+            }}]
+        )
+        if fallback.modified_count:
+            logger.warning(
+                f"⚠️ {fallback.modified_count} report timestamps did not parse; "
+                "used their insertion time (original kept in timestamp_raw)"
+            )
+        unconverted = await db.analysis_reports.count_documents({"timestamp": {"$type": "string"}})
+        if unconverted:
+            logger.warning(
+                f"⚠️ {unconverted} report timestamps are still strings and are skipped by "
+                "retention cleanup and date-range analytics"
+            )
+        
         # Create indexes for faster queries
         await db.analysis_reports.create_index("report_id", unique=True)
         await db.analysis_reports.create_index("timestamp")
@@ -2205,6 +2256,11 @@ async def startup_db_optimization():
         await db.url_checks.create_index("url", unique=True)
         await db.url_checks.create_index("expires_at")
         
+        # Daily trend counters (Phase 4 analytics)
+        backfilled = await backfill_daily_trends(db)
+        if backfilled:
+            logger.info(f"✅ Backfilled {backfilled} days of analytics trends")
+        
         logger.info("✅ Database indexes created successfully")
         logger.info("✅ Connection pool configured (10-50 connections)")
         
@@ -0,0 +1,264 @@
+"""
+Unit tests for the daily analytics trend counters
+"""
+import asyncio
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import analytics_trends
+from analytics_trends import (
+    backfill_daily_trends, record_daily_trend, remove_daily_trends, read_daily_trends
+)
+
+
+def _get(doc, path):
+    for key in path.split("."):
+        if not isinstance(doc, dict) or key not in doc:
+            return None, False
+        doc = doc[key]
+    return doc, True
+
+
+def _set(doc, path, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[last] = value
+
+
+def _unset(doc, path):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.get(key, {})
+    doc.pop(last, None)
+
+
+def _comparable(value):
+    # Mongo hands dates back naive; compare everything as aware UTC
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value, present = _get(doc, key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$exists" and present != operand:
+                return False
+            if op == "$type" and not (operand == "string" and isinstance(value, str)):
+                return False
+            if op in ("$lt", "$gte"):
+                if not present or type(_comparable(value)) is not type(_comparable(operand)):
+                    return False
+                less = _comparable(value) < _comparable(operand)
+                if less != (op == "$lt"):
+                    return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    """The subset of a motor collection the trend code uses"""
+
+    def __init__(self):
+        self.docs = {}
+        self.fail_on_update = None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([copy.deepcopy(d) for d in self.docs.values() if _matches(d, query or {})])
+
+    async def find_one(self, query, projection=None):
+        docs = self.find(query).docs
+        return docs[0] if docs else None
+
+    async def insert_one(self, doc):
+        self.docs[doc.get("_id", len(self.docs))] = copy.deepcopy(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        if self.fail_on_update is not None:
+            self.fail_on_update -= 1
+            if self.fail_on_update < 0:
+                raise RuntimeError("worker died")
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        inserted = doc is None
+        if inserted:
+            if not upsert:
+                return
+            doc = {"_id": query["_id"]}
+            self.docs[doc["_id"]] = doc
+            for path, value in update.get("$setOnInsert", {}).items():
+                _set(doc, path, value)
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, copy.deepcopy(value))
+        for path in update.get("$unset", {}):
+            _unset(doc, path)
+        for path, value in update.get("$inc", {}).items():
+            _set(doc, path, (_get(doc, path)[0] or 0) + value)
+
+    async def find_one_and_update(self, query, update):
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        if doc is None:
+            return None
+        before = copy.deepcopy(doc)
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, value)
+        return before
+
+
+class FakeDB:
+    def __init__(self):
+        self.analysis_reports = FakeCollection()
+        self.analytics_daily = FakeCollection()
+        self.analytics_meta = FakeCollection()
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _report(report_id, timestamp, risk="high", classification="Likely AI-Generated"):
+    return {
+        "_id": report_id,
+        "report_id": report_id,
+        "user_id": "user-1",
+        "timestamp": timestamp,
+        "scam_assessment": {"risk_level": risk},
+        "origin_verdict": {"classification": classification},
+    }
+
+
+def _totals(db, day="2026-01-01"):
+    trends = {t["date"]: t for t in _run(read_daily_trends(db, "2000-01-01"))}
+    return trends.get(day, {}).get("total", 0)
+
+
+@pytest.fixture
+def db():
+    analytics_trends._cutoff = None
+    yield FakeDB()
+    analytics_trends._cutoff = None
+
+
+@pytest.fixture
+def cutoff(db):
+    """Fix the cutoff before any reports are inserted"""
+    at = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    _run(db.analytics_meta.insert_one({"_id": "daily_trends", "cutoff": at.replace(tzinfo=None)}))
+    return at
+
+
+@pytest.mark.unit
+class TestDailyTrends:
+    """Test backfill/live daily trend bookkeeping"""
+
+    def test_backfill_counts_reports_before_cutoff(self, db, cutoff):
+        _run(db.analysis_reports.insert_one(_report("a", cutoff - timedelta(hours=2))))
+        _run(db.analysis_reports.insert_one(_report("b", "2026-01-01T01:00:00+00:00", risk="low",
+                                                    classification="Likely Original")))
+
+        assert _run(backfill_daily_trends(db)) == 1
+        trend = _run(read_daily_trends(db, "2026-01-01"))[0]
+        assert trend == {
+            "date": "2026-01-01", "total": 2, "high_risk": 1, "medium_risk": 0, "low_risk": 1,
+            "ai_generated": 1, "original": 1, "unclear": 0,
+        }
+
+    def test_completed_backfill_does_not_rerun(self, db, cutoff):
+        _run(db.analysis_reports.insert_one(_report("a", cutoff - timedelta(hours=1))))
+
+        _run(backfill_daily_trends(db))
+        assert _run(backfill_daily_trends(db)) == 0
+        assert _totals(db) == 1
+
+    def test_report_near_cutoff_counted_once(self, db, cutoff):
+        """A report just before the cutoff belongs to the backfill, one at it to the live counters"""
+        before = _report("before", cutoff - timedelta(milliseconds=1))
+        at = _report("at", cutoff)
+        for report in (before, at):
+            _run(db.analysis_reports.insert_one(report))
+            _run(record_daily_trend(db, report))
+
+        _run(backfill_daily_trends(db))
+        assert _totals(db) == 2
+        daily = _run(db.analytics_daily.find_one({"_id": "2026-01-01"}))
+        assert daily["backfill"]["total"] == 1
+        assert daily["live"]["total"] == 1
+
+    def test_crash_then_rerun_does_not_double_count(self, db, cutoff):
+        for day in (1, 2, 3):
+            report = _report(f"r{day}", cutoff - timedelta(days=day))
+            _run(db.analysis_reports.insert_one(report))
+        live = _report("live", cutoff + timedelta(minutes=5))
+        _run(db.analysis_reports.insert_one(live))
+        _run(record_daily_trend(db, live))
+
+        # First worker writes one day, then dies before completing
+        db.analytics_daily.fail_on_update = 1
+        with pytest.raises(RuntimeError):
+            _run(backfill_daily_trends(db))
+        db.analytics_daily.fail_on_update = None
+
+        # The claim is still fresh: nobody else takes it over yet
+        assert _run(backfill_daily_trends(db)) == 0
+
+        # Once stale, the next worker re-runs the whole backfill
+        meta = db.analytics_meta.docs["daily_trends"]
+        meta["claimed_at"] -= analytics_trends.BACKFILL_STALE_AFTER + timedelta(seconds=1)
+        assert _run(backfill_daily_trends(db)) == 3
+
+        trends = _run(read_daily_trends(db, "2000-01-01"))
+        assert [t["total"] for t in trends] == [1, 1, 1, 1]
+        assert "completed_at" in db.analytics_meta.docs["daily_trends"]
+
+    def test_backfill_replaces_legacy_counters(self, db, cutoff):
+        _run(db.analytics_daily.insert_one({"_id": "2026-01-01", "date": "2026-01-01", "total": 7}))
+        _run(db.analysis_reports.insert_one(_report("a", cutoff - timedelta(hours=1))))
+
+        _run(backfill_daily_trends(db))
+        assert _totals(db) == 1
+        assert "total" not in db.analytics_daily.docs["2026-01-01"]
+
+    def test_first_use_fixes_cutoff(self, db):
+        report = _report("a", datetime.now(timezone.utc))
+        _run(record_daily_trend(db, report))
+
+        stored = db.analytics_meta.docs["daily_trends"]["cutoff"]
+        analytics_trends._cutoff = None
+        _run(record_daily_trend(db, _report("b", datetime.now(timezone.utc))))
+        assert db.analytics_meta.docs["daily_trends"]["cutoff"] == stored
+
+    def test_remove_decrements_matching_side(self, db, cutoff):
+        old = _report("old", cutoff - timedelta(hours=1))
+        new = _report("new", cutoff + timedelta(hours=1))
+        for report in (old, new):
+            _run(db.analysis_reports.insert_one(report))
+            _run(record_daily_trend(db, report))
+        _run(backfill_daily_trends(db))
+
+        _run(remove_daily_trends(db, {"user_id": "user-1"}))
+        daily = db.analytics_daily.docs["2026-01-01"]
+        assert daily["backfill"]["total"] == 0
+        assert daily["live"]["total"] == 0
+        assert _totals(db) == 0
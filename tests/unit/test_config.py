@@ -8,10 +8,13 @@ from config import (
     TIER_LIMITS,
     COST_PER_ANALYSIS,
     PricingTier,
+    premium_break_even,
     MAX_FILE_SIZE,
     MAX_TEXT_LENGTH,
     API_PREFIX,
-    API_VERSION
+    API_VERSION,
+    validate_magic_bytes,
+    validate_mime_type
 )
 
 
@@ -53,6 +56,15 @@ class TestPricingEconomics:
         # Break-even should be less than 50% of monthly limit
         assert break_even < 500, f"Break-even too high: {break_even} analyses"
 
+    def test_break_even_accessor_matches(self):
+        """Test the lazy break-even accessor matches the pricing tables"""
+        assert premium_break_even() == TIER_PRICING[PricingTier.PREMIUM] / COST_PER_ANALYSIS['image']
+
+    def test_pricing_tables_are_read_only(self):
+        """Test pricing tables cannot be mutated at runtime"""
+        with pytest.raises(TypeError):
+            TIER_PRICING[PricingTier.PREMIUM] = 0
+
 
 @pytest.mark.unit
 class TestSecurityLimits:
@@ -78,3 +90,59 @@ class TestAPIConfiguration:
     def test_api_prefix_versioned(self):
         """Test API prefix includes version"""
         assert API_PREFIX == "/api/v1"
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestMagicBytes:
+    """Test magic bytes validation"""
+    
+    def test_valid_png_signature(self, sample_image_bytes):
+        """Test real PNG header passes"""
+        assert validate_magic_bytes(sample_image_bytes, 'png')
+    
+    def test_valid_alternate_signature(self):
+        """Test any of several signatures for a type passes"""
+        assert validate_magic_bytes(b'GIF87a' + b'\x00' * 10, 'gif')
+        assert validate_magic_bytes(b'GIF89a' + b'\x00' * 10, 'gif')
+        assert validate_magic_bytes(b'ID3\x03\x00', 'mp3')
+        assert validate_magic_bytes(b'\xFF\xF3\x90', 'mp3')
+    
+    def test_spoofed_type_rejected(self, sample_image_bytes):
+        """Test PNG bytes declared as JPEG are rejected"""
+        assert not validate_magic_bytes(sample_image_bytes, 'jpeg')
+    
+    def test_truncated_signature_rejected(self):
+        """Test data shorter than the signature is rejected"""
+        assert not validate_magic_bytes(b'\x89PNG', 'png')
+        assert not validate_magic_bytes(b'', 'png')
+    
+    def test_unknown_type_passes(self):
+        """Test types without a known signature are not blocked"""
+        assert validate_magic_bytes(b'anything', 'webp')
+    
+    def test_memoryview_accepted(self, sample_image_bytes):
+        """Test a memoryview over the upload is accepted without copying it"""
+        assert validate_magic_bytes(memoryview(sample_image_bytes), 'png')
+        assert not validate_magic_bytes(memoryview(sample_image_bytes), 'gif')
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestMimeTypes:
+    """Test MIME type allow-lists"""
+    
+    def test_allowed_types_per_content(self):
+        """Test each content type accepts its own MIME types only"""
+        assert validate_mime_type('image/png', 'image')
+        assert validate_mime_type('video/mp4', 'video')
+        assert validate_mime_type('audio/wav', 'audio')
+        assert not validate_mime_type('video/mp4', 'image')
+    
+    def test_unknown_content_type_rejected(self):
+        """Test unknown content categories are rejected"""
+        assert not validate_mime_type('image/png', 'document')
+    
+    def test_mime_type_not_case_folded(self):
+        """Test MIME types are expected pre-normalized by the caller"""
+        assert not validate_mime_type('IMAGE/PNG', 'image')
@@ -0,0 +1,266 @@
+"""
+Unit tests for field-level encryption
+"""
+import base64
+import json
+
+import pytest
+from cryptography.fernet import Fernet
+
+from encryption import EncryptionManager
+
+
+@pytest.fixture
+def manager():
+    """Encryption manager with a throwaway key"""
+    return EncryptionManager(Fernet.generate_key().decode('utf-8'))
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestEncryptDecrypt:
+    """Test encrypt/decrypt round-trips"""
+
+    @pytest.mark.parametrize("value", [
+        "plain text",
+        "unicode ✓ ₹299",
+        "",
+        b"\x00\x01raw bytes",
+        {"nested": [1, 2, {"k": "v"}]},
+        42,
+        None,
+    ])
+    def test_round_trip_preserves_type(self, manager, value):
+        """Test decrypt(encrypt(x)) returns the original value and type"""
+        result = manager.decrypt(manager.encrypt(value))
+        assert result == value
+        assert type(result) is type(value)
+
+    def test_token_is_versioned_aes_gcm(self, manager):
+        """Test encrypt emits a version-prefixed AES-GCM token"""
+        token = manager.encrypt("secret")
+        assert base64.urlsafe_b64decode(token)[:1] == b"\x02"
+
+    def test_nonce_is_random(self, manager):
+        """Test equal plaintexts give different tokens"""
+        assert manager.encrypt("secret") != manager.encrypt("secret")
+
+    def test_tampered_token_rejected(self, manager):
+        """Test AES-GCM authentication catches modified ciphertext"""
+        blob = bytearray(base64.urlsafe_b64decode(manager.encrypt("secret")))
+        blob[-1] ^= 0x01
+        with pytest.raises(Exception):
+            manager.decrypt(base64.urlsafe_b64encode(bytes(blob)).decode('ascii'))
+
+    def test_fernet_tagged_format_still_decrypts(self, manager):
+        """Test values written as tagged Fernet tokens"""
+        token = manager.cipher.encrypt(b"R" + "secret".encode('utf-8')).decode('ascii')
+        assert manager.decrypt(token) == "secret"
+
+    def test_legacy_base64_json_format_still_decrypts(self, manager):
+        """Test values written by the old base64(Fernet(json)) format"""
+        token = manager.cipher.encrypt(json.dumps({"email": "a@b.c"}).encode('utf-8'))
+        legacy = base64.b64encode(token).decode('utf-8')
+        assert manager.decrypt(legacy) == {"email": "a@b.c"}
+
+    def test_wrong_key_fails(self, manager):
+        """Test decrypting with another key raises"""
+        other = EncryptionManager(Fernet.generate_key().decode('utf-8'))
+        with pytest.raises(Exception):
+            other.decrypt(manager.encrypt("secret"))
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestFieldEncryption:
+    """Test per-field helpers"""
+
+    def test_encrypt_field_removes_plaintext(self, manager):
+        """Test plaintext field is replaced by its encrypted counterpart"""
+        doc = manager.encrypt_field({"email": "a@b.c", "name": "x"}, "email")
+        assert "email" not in doc
+        assert "email_encrypted" in doc
+        assert doc["name"] == "x"
+
+    def test_decrypt_field_restores_plaintext(self, manager):
+        """Test encrypted field is restored"""
+        doc = manager.encrypt_field({"email": "a@b.c"}, "email")
+        doc = manager.decrypt_field(doc, "email")
+        assert doc == {"email": "a@b.c"}
+
+    def test_deterministic_field_gives_stable_token(self, manager):
+        """Test opted-in fields encrypt equal values to equal tokens"""
+        first = manager.encrypt_field({"country": "IN"}, "country")
+        second = manager.encrypt_field({"country": "IN"}, "country")
+        assert first == second
+        assert manager.decrypt_field(first, "country") == {"country": "IN"}
+
+    def test_other_fields_stay_randomized(self, manager):
+        """Test fields outside DETERMINISTIC_FIELDS still use random nonces"""
+        first = manager.encrypt_field({"email": "a@b.c"}, "email")
+        second = manager.encrypt_field({"email": "a@b.c"}, "email")
+        assert first != second
+
+    def test_deterministic_tokens_are_key_specific(self, manager):
+        """Test the deterministic cache is not shared across keys"""
+        other = EncryptionManager(Fernet.generate_key().decode('utf-8'))
+        assert manager.encrypt_deterministic("IN") != other.encrypt_deterministic("IN")
+
+    def test_failed_encrypt_leaves_field(self, manager):
+        """Test a value the cipher can't serialize stays in the document"""
+        doc = {"email": {1, 2}}
+        with pytest.raises(Exception):
+            manager.encrypt_field(doc, "email")
+        assert doc == {"email": {1, 2}}
+
+    def test_failed_decrypt_leaves_token(self, manager):
+        """Test a token for another key stays in the document"""
+        other = EncryptionManager(Fernet.generate_key().decode('utf-8'))
+        doc = other.encrypt_field({"email": "a@b.c"}, "email")
+        original = dict(doc)
+        with pytest.raises(Exception):
+            manager.decrypt_field(doc, "email")
+        assert doc == original
+
+    def test_none_field_left_untouched(self, manager):
+        """Test None values are not encrypted"""
+        assert manager.encrypt_field({"email": None}, "email") == {"email": None}
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestFieldBundle:
+    """Test bundled multi-field encryption"""
+
+    def test_bundle_round_trip(self, manager):
+        """Test several fields encrypt into one bundle and come back"""
+        doc = {"email": "a@b.c", "phone": "+91 98765", "age": 30, "name": "x"}
+        encrypted = manager.encrypt_fields_bundle(dict(doc), ["email", "phone", "age", "missing"])
+        assert set(encrypted) == {"name", "_encrypted_bundle"}
+        assert manager.decrypt_fields_bundle(encrypted) == doc
+
+    def test_corrupt_bundle_leaves_document(self, manager):
+        """Test a bundle that fails to decrypt is kept, not dropped"""
+        doc = manager.encrypt_fields_bundle({"email": "a@b.c", "name": "x"}, ["email"])
+        doc["_encrypted_bundle"] = doc["_encrypted_bundle"][:-4] + "AAAA"
+        original = dict(doc)
+        with pytest.raises(Exception):
+            manager.decrypt_fields_bundle(doc)
+        assert doc == original
+
+    def test_unserializable_field_not_dropped(self, manager):
+        """Test fields stay in plaintext when the bundle can't be encrypted"""
+        doc = {"email": "a@b.c", "tags": {1, 2}}
+        with pytest.raises(Exception):
+            manager.encrypt_fields_bundle(doc, ["email", "tags"])
+        assert doc == {"email": "a@b.c", "tags": {1, 2}}
+
+    def test_empty_bundle_not_written(self, manager):
+        """Test no bundle is added when no listed field is present"""
+        assert manager.encrypt_fields_bundle({"name": "x"}, ["email"]) == {"name": "x"}
+
+    def test_sensitive_fields_keep_deterministic_fields_searchable(self):
+        """Test deterministic fields get stable per-field tokens through encrypt_sensitive_fields"""
+        from encryption import encrypt_sensitive_fields, decrypt_sensitive_fields
+
+        fields = ["country", "email"]
+        first = encrypt_sensitive_fields({"country": "IN", "email": "a@b.c"}, fields)
+        second = encrypt_sensitive_fields({"country": "IN", "email": "a@b.c"}, fields)
+        assert set(first) == {"country_encrypted", "_encrypted_bundle"}
+        assert first["country_encrypted"] == second["country_encrypted"]
+        assert first["_encrypted_bundle"] != second["_encrypted_bundle"]
+        assert decrypt_sensitive_fields(first, fields) == {"country": "IN", "email": "a@b.c"}
+
+    def test_sensitive_fields_helpers_read_legacy_per_field(self):
+        """Test decrypt_sensitive_fields also handles per-field encrypted values"""
+        from encryption import encryption_manager, encrypt_sensitive_fields, decrypt_sensitive_fields
+
+        legacy = encryption_manager.encrypt_field({"email": "a@b.c"}, "email")
+        bundled = encrypt_sensitive_fields({"phone": "123"}, ["phone"])
+        doc = decrypt_sensitive_fields({**legacy, **bundled}, ["email", "phone"])
+        assert doc == {"email": "a@b.c", "phone": "123"}
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestKeyDerivation:
+    """Test password-based key derivation"""
+
+    def test_derived_key_is_valid_fernet_key(self):
+        """Test the derived key can build a working manager"""
+        key, salt = EncryptionManager.derive_key_from_password("correct horse", iterations=1000)
+        manager = EncryptionManager(key)
+        assert manager.decrypt(manager.encrypt("x")) == "x"
+        assert len(base64.b64decode(salt)) == 16
+
+    def test_same_password_and_salt_give_same_key(self):
+        """Test derivation is deterministic for a given salt"""
+        salt = b"0123456789abcdef"
+        key1, _ = EncryptionManager.derive_key_from_password("pw", salt, iterations=1000)
+        key2, _ = EncryptionManager.derive_key_from_password("pw", salt, iterations=1000)
+        assert key1 == key2
+
+    def test_repeat_derivation_is_cached(self, monkeypatch):
+        """Test a known (password, salt) pair is only derived once"""
+        import encryption
+
+        calls = []
+        derive = encryption._pbkdf2_sha256
+        monkeypatch.setattr(encryption, '_pbkdf2_sha256', lambda *args: calls.append(args) or derive(*args))
+        salt = b"fedcba9876543210"
+        first = EncryptionManager.derive_key_from_password("cached pw", salt, iterations=1000)
+        second = EncryptionManager.derive_key_from_password("cached pw", salt, iterations=1000)
+        assert first == second
+        assert len(calls) == 1
+
+    def test_cache_does_not_hold_passwords(self):
+        """Test cached derivations are keyed by a digest, not the plaintext password"""
+        import encryption
+
+        EncryptionManager.derive_key_from_password("hunter2 secret", b"0011223344556677", iterations=1000)
+        assert not any(b"hunter2 secret" in key for key, _, _ in encryption._pbkdf2_cache)
+
+    def test_matches_previous_pbkdf2hmac_output(self):
+        """Test keys derived at 100k iterations match the old PBKDF2HMAC implementation"""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+        salt = b"0123456789abcdef"
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000)
+        expected = base64.urlsafe_b64encode(kdf.derive(b"pw")).decode('utf-8')
+        key, _ = EncryptionManager.derive_key_from_password("pw", salt, iterations=100000)
+        assert key == expected
+
+
+@pytest.mark.unit
+class TestDefaultManager:
+    """Test the shared default ciphers"""
+
+    def test_default_managers_share_cipher(self):
+        """Test managers without an explicit key reuse one cipher instance"""
+        from encryption import get_default_manager
+
+        assert EncryptionManager().aead is EncryptionManager().aead
+        assert get_default_manager().aead is EncryptionManager().aead
+
+    def test_explicit_key_gets_own_cipher(self, manager):
+        """Test a custom key does not use the shared cipher"""
+        assert manager.aead is not EncryptionManager().aead
+
+    def test_missing_key_fails_in_production(self, monkeypatch):
+        """Test no temporary key is generated in production"""
+        from encryption import _load_default_key
+
+        monkeypatch.delenv("ENCRYPTION_KEY", raising=False)
+        monkeypatch.setenv("ENVIRONMENT", "production")
+        with pytest.raises(RuntimeError):
+            _load_default_key()
+
+    def test_missing_key_generates_temporary_key_in_development(self, monkeypatch):
+        """Test development falls back to a temporary key"""
+        from encryption import _load_default_key
+
+        monkeypatch.delenv("ENCRYPTION_KEY", raising=False)
+        monkeypatch.setenv("ENVIRONMENT", "development")
+        manager = EncryptionManager(_load_default_key())
+        assert manager.decrypt(manager.encrypt("x")) == "x"
@@ -0,0 +1,436 @@
+"""
+Unit tests for image forensics
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import forensics
+from forensics import ForensicAnalyzer, fuse_evidence, fuse_evidence_batch
+
+
+@pytest.fixture
+def analyzer():
+    """Forensic analyzer instance"""
+    return ForensicAnalyzer()
+
+
+def camera_jpeg():
+    """Small JPEG with camera-style EXIF metadata"""
+    exif = Image.Exif()
+    exif[271] = 'Canon'
+    exif[272] = 'EOS 5D'
+    exif[305] = 'Stable Diffusion'
+    exif[306] = '2024:01:01 10:00:00'
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[36867] = '2024:01:01 10:00:00'
+    exif_ifd[36864] = b'0231'
+    output = io.BytesIO()
+    Image.new('RGB', (64, 48), 'blue').save(output, format='JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+def encode_image(array, image_format='PNG'):
+    """Encode a uint8 array as image bytes"""
+    output = io.BytesIO()
+    Image.fromarray(array).save(output, format=image_format)
+    return output.getvalue()
+
+
+@pytest.mark.unit
+class TestImageStatistics:
+    """Test channel statistics"""
+
+    def test_flat_image_flagged_uniform(self, analyzer):
+        """Test a single-colour image is reported as unnaturally uniform"""
+        image = Image.new('RGB', (300, 200), color=(10, 120, 250))
+        stats = analyzer._analyze_image_statistics(image)
+        assert stats['red_channel'] == {'mean': 10.0, 'std_dev': 0.0}
+        assert stats['blue_channel']['mean'] == 250.0
+        assert stats['uniformity_score'] == 1.0
+        assert stats['suspicious_patterns']
+
+    def test_noisy_image_statistics(self, analyzer):
+        """Test statistics match the true channel statistics"""
+        pixels = np.random.default_rng(0).integers(0, 256, (400, 300, 3), dtype=np.uint8)
+        stats = analyzer._analyze_image_statistics(Image.fromarray(pixels))
+        assert stats['green_channel']['mean'] == round(pixels[..., 1].mean(), 2)
+        assert stats['green_channel']['std_dev'] == round(pixels[..., 1].std(), 2)
+        assert stats['uniformity_score'] == 0.0
+
+    @pytest.mark.parametrize("size", [1000, 2000])
+    def test_checkerboard_not_aliased(self, analyzer, size):
+        """Test a one-pixel checkerboard keeps its full contrast"""
+        board = ((np.indices((size, size)).sum(axis=0) % 2) * 255).astype(np.uint8)
+        stats = analyzer._analyze_image_statistics(Image.fromarray(np.dstack([board] * 3)))
+        assert stats['red_channel'] == {'mean': 127.5, 'std_dev': 127.5}
+        assert 'Very low color variance (unnatural uniformity)' not in stats['suspicious_patterns']
+
+    def test_histogram_moments_match_numpy(self):
+        """Test moments computed from channel histograms agree with NumPy's mean/std"""
+        pixels = np.random.default_rng(1).integers(0, 256, (500, 3), dtype=np.uint8)
+        histogram = np.stack([np.bincount(pixels[:, channel], minlength=256) for channel in range(3)])
+        means, std_devs = forensics._histogram_moments(histogram)
+        np.testing.assert_allclose(means, pixels.mean(axis=0))
+        np.testing.assert_allclose(std_devs, pixels.std(axis=0))
+
+    def test_small_and_grayscale_images(self, analyzer):
+        """Test small images and non-RGB modes"""
+        image = Image.new('L', (5, 4), color=77)
+        stats = analyzer._analyze_image_statistics(image)
+        assert stats['red_channel']['mean'] == stats['blue_channel']['mean'] == 77.0
+
+
+@pytest.mark.unit
+class TestAnalyzeImage:
+    """Test the full image analysis pipeline"""
+
+    def test_ai_typical_png(self, analyzer):
+        """Test a 512x512 PNG without EXIF gets AI indicators"""
+        result = analyzer.analyze_image(encode_image(np.zeros((512, 512, 3), dtype=np.uint8)))
+        ai_signals = result['forensic_indicators']['ai_signals']
+        assert result['properties']['width'] == 512
+        assert any('multiples of 512' in signal for signal in ai_signals)
+        assert any('No EXIF' in signal for signal in ai_signals)
+
+    def test_camera_exif_read(self, analyzer):
+        """Test EXIF fields from both IFD0 and the EXIF sub-IFD are found"""
+        exif = analyzer.analyze_image(camera_jpeg())['exif']
+        assert exif['camera_info'] == 'Image Make: Canon'
+        assert exif['datetime'] == '2024:01:01 10:00:00'
+        assert exif['missing_expected_fields'] == []
+        assert exif['suspicious_software']
+        assert exif['ai_generation_indicators'].count("Software field contains 'stable diffusion'") == 1
+
+    def test_statistics_count_against_complete_camera_exif(self, analyzer):
+        """Test uniform pixels still temper a camera+GPS verdict"""
+        exif = Image.Exif()
+        exif[271] = 'Canon'
+        exif[272] = 'EOS 5D'
+        exif[306] = '2024:01:01 10:00:00'
+        exif_ifd = exif.get_ifd(0x8769)
+        exif_ifd[36867] = '2024:01:01 10:00:00'
+        exif_ifd[36864] = b'0231'
+        exif.get_ifd(0x8825)[2] = (1.0, 2.0, 3.0)
+        output = io.BytesIO()
+        Image.new('RGB', (64, 48), 'blue').save(output, format='JPEG', exif=exif.tobytes())
+        result = analyzer.analyze_image(output.getvalue())
+        assert 'Statistical anomaly: Very low color variance (unnatural uniformity)' in result['forensic_indicators']['ai_signals']
+        assert fuse_evidence(result, opinion())[:2] == ('Unclear / Mixed Signals', 'low')
+
+    def test_png_exif_read_with_exifread_names(self, analyzer):
+        """Test PNG eXIf metadata is read via PIL under exifread-style names"""
+        exif = Image.Exif()
+        exif[271] = 'Canon'
+        exif.get_ifd(0x8825)[2] = (1.0, 2.0, 3.0)
+        output = io.BytesIO()
+        Image.new('RGB', (30, 20)).save(output, format='PNG', exif=exif.tobytes())
+        signals = analyzer.analyze_image(output.getvalue())['exif']
+        assert signals['camera_info'] == 'Image Make: Canon'
+        assert signals['gps'] == 'Present'
+
+    def test_jpeg_exif_segment_located(self, analyzer):
+        """Test the Exif APP1 end offset is found, and 0 is returned without one"""
+        data = camera_jpeg()
+        exif_end = analyzer._find_jpeg_exif_end(data)
+        assert 0 < exif_end < len(data)
+        assert analyzer._extract_exif(data[:exif_end], None)['Image Make'] == 'Canon'
+        assert analyzer._find_jpeg_exif_end(encode_image(np.zeros((8, 8, 3), dtype=np.uint8), 'JPEG')) == 0
+
+    def test_libjpeg_tables_identified(self, analyzer):
+        """Test Pillow-encoded JPEG tables are matched to their quality"""
+        output = io.BytesIO()
+        Image.new('RGB', (40, 30)).save(output, format='JPEG', quality=60)
+        result = analyzer.analyze_image(output.getvalue())
+        compression = result['compression']
+        assert compression['jpeg_quality'] == 60
+        assert compression['standard_quantization_tables']
+        assert compression['re_encoding_indicators'] == ['Low JPEG quality (~60) suggests re-encoding']
+        indicators = result['forensic_indicators']
+        assert any('Standard libjpeg' in signal for signal in indicators['inconclusive_signals'])
+        assert not any('Standard libjpeg' in signal for signal in indicators['manipulation_signals'])
+
+    @pytest.mark.parametrize("mode,bytes_per_pixel", [('1', 0.125), ('I;16', 2), ('RGB', 3)])
+    def test_compression_ratio_uses_mode_pixel_size(self, analyzer, mode, bytes_per_pixel):
+        """Test the uncompressed size follows the mode's real bytes per pixel"""
+        output = io.BytesIO()
+        Image.new(mode, (64, 32)).save(output, format='PNG')
+        image_bytes = output.getvalue()
+        compression = analyzer.analyze_image(image_bytes)['compression']
+        assert compression['compression_ratio'] == round(len(image_bytes) / (64 * 32 * bytes_per_pixel), 4)
+
+    def test_custom_tables_estimated(self, analyzer):
+        """Test non-libjpeg tables get an approximate quality"""
+        quantization = {0: [2 * value for value in forensics.IJG_LUMINANCE_TABLE], 1: [1] * 64}
+        assert analyzer._jpeg_table_quality(quantization) == (25, False)
+
+    def test_invalid_bytes_return_error(self, analyzer):
+        """Test undecodable input is reported, not raised"""
+        result = analyzer.analyze_image(b'not an image')
+        assert 'error' in result
+        assert result['forensic_indicators']['inconclusive_signals']
+
+
+@pytest.mark.unit
+class TestResultCache:
+    """Test content-addressed reuse of analysis results"""
+
+    def test_identical_bytes_analyzed_once(self, analyzer, monkeypatch):
+        """Test resubmitting the same image returns the stored result"""
+        calls = []
+        analyze = analyzer._analyze_image_uncached
+        monkeypatch.setattr(analyzer, '_analyze_image_uncached', lambda data: calls.append(data) or analyze(data))
+        image_bytes = camera_jpeg()
+        first = analyzer.analyze_image(image_bytes)
+        second = analyzer.analyze_image(bytes(image_bytes))
+        assert first == second
+        assert len(calls) == 1
+
+    def test_cached_result_isolated_from_caller_changes(self, analyzer):
+        """Test callers appending indicators do not alter later hits"""
+        image_bytes = camera_jpeg()
+        first = analyzer.analyze_image(image_bytes)
+        first['forensic_indicators']['ai_signals'].append('added by caller')
+        second = analyzer.analyze_image(image_bytes)
+        assert 'added by caller' not in second['forensic_indicators']['ai_signals']
+
+    def test_expired_results_reanalyzed(self, analyzer, monkeypatch):
+        """Test entries older than the TTL are dropped on lookup"""
+        image_bytes = camera_jpeg()
+        analyzer.analyze_image(image_bytes)
+        monkeypatch.setattr(forensics, 'ANALYSIS_CACHE_TTL', -1.0)
+        assert analyzer._cache_lookup(analyzer._cache_key('image', image_bytes)) is None
+        assert not analyzer._result_cache
+
+    def test_fingerprint_is_128_bit_and_content_addressed(self, analyzer):
+        """Test cache keys depend only on payload bytes"""
+        fingerprint = analyzer._fingerprint(b'payload')
+        assert len(fingerprint) == 32
+        assert fingerprint == analyzer._fingerprint(bytearray(b'payload'))
+        assert fingerprint != analyzer._fingerprint(b'payload!')
+
+    def test_errors_not_cached(self, analyzer):
+        """Test failed analyses are retried on resubmission"""
+        analyzer.analyze_image(b'not an image')
+        assert not analyzer._result_cache
+
+
+@pytest.mark.unit
+class TestTempMedia:
+    """Test temp files handed to external tools"""
+
+    def test_written_to_memory_dir(self, monkeypatch, tmp_path):
+        """Test media lands in MEDIA_TEMP_DIR when it is usable"""
+        monkeypatch.setattr(forensics, 'MEDIA_TEMP_DIR', str(tmp_path))
+        path = ForensicAnalyzer._write_temp_media(b'media', '.mp4')
+        assert os.path.dirname(path) == str(tmp_path)
+        with open(path, 'rb') as f:
+            assert f.read() == b'media'
+        os.unlink(path)
+
+    def test_falls_back_to_default_temp_dir(self, monkeypatch, tmp_path):
+        """Test an unusable memory dir falls back to the default temp dir"""
+        monkeypatch.setattr(forensics, 'MEDIA_TEMP_DIR', str(tmp_path / 'missing'))
+        path = ForensicAnalyzer._write_temp_media(b'media', '.mp3')
+        assert os.path.dirname(path) == tempfile.gettempdir()
+        assert path.endswith('.mp3')
+        os.unlink(path)
+
+
+@pytest.mark.unit
+class TestAudioPitch:
+    """Test pitch statistics ignore silence"""
+
+    def test_silent_frames_excluded_from_pitch(self, analyzer):
+        """Test f0 estimates from silent frames do not reach the pitch statistics"""
+        rms = np.concatenate([np.full(40, 0.3), np.zeros(40)])
+        rng = np.random.default_rng(0)
+        f0 = np.concatenate([np.full(40, 220.0), rng.uniform(50, 2000, 40)])
+        pitch_values = analyzer._voiced_pitch(f0, analyzer._non_silent_frames(rms))
+        assert pitch_values.size == 40
+        assert np.std(pitch_values) == 0
+
+    def test_nonsilent_intervals_from_frames(self, analyzer):
+        """Test frame runs map to sample intervals clipped to the signal"""
+        non_silent = analyzer._non_silent_frames(np.array([0.0, 0.5, 0.5, 0.0, 0.4]))
+        intervals = analyzer._nonsilent_intervals(non_silent, 512, 2300)
+        assert intervals.tolist() == [[512, 1536], [2048, 2300]]
+
+    @pytest.mark.skipif(not forensics.AUDIO_AVAILABLE, reason="audio libraries not installed")
+    def test_voiced_then_silent_signal(self, analyzer):
+        """Test a steady tone followed by silence keeps the tone's pitch"""
+        sr = 16000
+        t = np.arange(sr) / sr
+        y = np.concatenate([0.5 * np.sin(2 * np.pi * 220 * t), np.zeros(sr)]).astype(np.float32)
+        properties = analyzer._analyze_audio_properties(y, sr)
+        assert abs(properties['pitch_mean'] - 220) < 10
+        assert properties['pitch_std'] < 20
+        assert properties['silence_ratio'] > 0.4
+
+    @pytest.mark.parametrize("sr", [96000, 192000])
+    @pytest.mark.skipif(not forensics.AUDIO_AVAILABLE, reason="audio libraries not installed")
+    def test_high_sample_rates(self, analyzer, sr):
+        """Test studio sample rates still give a pitch estimate"""
+        t = np.arange(sr) / sr
+        y = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        properties = analyzer._analyze_audio_properties(y, sr)
+        assert abs(properties['pitch_mean'] - 220) < 10
+        assert 'energy_std' in properties
+
+    def test_pitch_frame_fits_lowest_period(self, analyzer):
+        """Test the yin frame grows with the sample rate"""
+        assert analyzer._pitch_frame_length(16000) == 2048
+        assert analyzer._pitch_frame_length(48000) == 2048
+        assert analyzer._pitch_frame_length(96000) == 4096
+        assert analyzer._pitch_frame_length(192000) == 8192
+
+
+@pytest.mark.unit
+class TestVideoIndicators:
+    """Test video forensic indicators"""
+
+    def test_camera_like_video(self, analyzer):
+        """Test standard camera properties produce human signals"""
+        indicators = analyzer._extract_video_forensic_indicators({
+            'metadata': {'creation_time': '2024-01-01T00:00:00Z'},
+            'video_codec': 'h264',
+            'video_profile': 'High',
+            'frame_rate': '30/1',
+            'width': 1920,
+            'height': 1080,
+            'has_audio': True,
+            'bit_rate': 8000,
+            'duration': 10.0,
+            'size': 10000,
+        })
+        assert "Standard camera resolution (1920x1080)" in indicators['human_signals']
+        assert indicators['ai_signals'] == []
+
+    @pytest.mark.parametrize("frame_rate,standard", [
+        ('30/1', True), ('30000/1001', True), ('60000/1001', True), ('25', True), ('27/1', False),
+    ])
+    def test_standard_frame_rates(self, analyzer, frame_rate, standard):
+        """Test NTSC timings count as their nominal camera frame rate"""
+        indicators = analyzer._extract_video_forensic_indicators({'frame_rate': frame_rate, 'has_audio': True})
+        assert any('Standard camera frame rate' in signal for signal in indicators['human_signals']) == standard
+
+    @pytest.mark.parametrize("frame_rate", ['0/0', 'N/A', '30/0'])
+    def test_malformed_frame_rate_ignored(self, analyzer, frame_rate):
+        """Test unknown or zero-denominator rates add no indicator"""
+        indicators = analyzer._extract_video_forensic_indicators({'frame_rate': frame_rate, 'has_audio': True})
+        assert not any('frame rate' in signal for signal in indicators['human_signals'] + indicators['ai_signals'])
+
+    def test_generator_like_video(self, analyzer):
+        """Test AI-typical dimensions and a missing audio track are flagged"""
+        indicators = analyzer._extract_video_forensic_indicators({
+            'width': 512,
+            'height': 512,
+            'has_audio': False,
+        })
+        assert len(indicators['ai_signals']) == 2
+
+
+def signals(human=0, ai=0, manipulation=0, inconclusive=0):
+    """Forensic result with the given number of indicators of each kind"""
+    return {'forensic_indicators': {
+        'human_signals': [f'human {i}' for i in range(human)],
+        'ai_signals': [f'ai {i}' for i in range(ai)],
+        'manipulation_signals': [f'edit {i}' for i in range(manipulation)],
+        'inconclusive_signals': [f'unclear {i}' for i in range(inconclusive)],
+    }}
+
+
+def opinion(classification='Unclear / Mixed Signals', confidence='low', ai_signals=()):
+    """AI opinion in the shape fuse_evidence reads"""
+    return {'origin': {'classification': classification, 'confidence': confidence}, 'ai_signals': list(ai_signals)}
+
+
+@pytest.mark.unit
+class TestFuseEvidence:
+    """Test forensic/AI evidence fusion rules"""
+
+    def test_strong_ai_evidence(self):
+        """Test three AI indicators without human signals are decisive"""
+        classification, confidence, reason, _ = fuse_evidence(signals(ai=5), opinion())
+        assert (classification, confidence) == ("Likely AI-Generated", 'high')
+        assert reason.startswith("Strong forensic evidence: 5 AI")
+
+    def test_ai_opinion_raises_confidence(self):
+        """Test agreeing strong AI opinion upgrades two AI indicators to high"""
+        assert fuse_evidence(signals(ai=2), opinion())[:2] == ("Likely AI-Generated", 'medium')
+        assert fuse_evidence(signals(ai=2), opinion("Likely AI-Generated", 'high'))[:2] == ("Likely AI-Generated", 'high')
+
+    def test_free_form_opinion_matched_anywhere(self):
+        """Test opinion labels count wherever they appear in a free-form answer"""
+        assert fuse_evidence(signals(ai=2), opinion("Most likely AI-generated", 'high'))[1] == 'high'
+        assert fuse_evidence(signals(human=2), opinion("This photo is likely original", 'medium'))[1] == 'high'
+
+    def test_human_source_with_edits_is_hybrid(self):
+        """Test human capture signals plus manipulation give Hybrid"""
+        classification, confidence, reason, _ = fuse_evidence(signals(human=1, ai=1, manipulation=4), opinion())
+        assert (classification, confidence) == ("Hybrid / Manipulated", 'high')
+        assert "4 manipulation indicators" in reason
+
+    def test_conflict_tiebreak_uses_uncapped_counts(self):
+        """Test the AI/human balance is compared on real counts, not capped ones"""
+        classification, _, reason, _ = fuse_evidence(signals(human=4, ai=5), opinion("Likely AI-Generated"))
+        assert classification == "Likely AI-Generated"
+        assert reason == "Mixed signals: 5 AI vs 4 human indicators, leaning AI-generated"
+        assert fuse_evidence(signals(human=5, ai=5), opinion("Likely AI-Generated"))[0] == "Unclear / Mixed Signals"
+
+    def test_result_fields_by_name(self):
+        """Test the fused result exposes named fields and still unpacks"""
+        result = fuse_evidence(signals(ai=3), opinion())
+        classification, confidence, reason, indicators = result
+        assert result.classification == classification == "Likely AI-Generated"
+        assert result._asdict()['indicators'] == indicators
+
+    def test_indicators_are_a_serializable_list(self):
+        """Test indicators come back as a plain list callers can extend and store"""
+        indicators = fuse_evidence(signals(human=2, ai=1), opinion(ai_signals='abcde')).indicators
+        assert type(indicators) is list
+        assert len(indicators) == 6
+        assert json.loads(json.dumps(indicators)) == indicators
+
+    def test_labels_are_interned(self):
+        """Test verdict labels are the interned string objects"""
+        result = fuse_evidence(signals(human=1, manipulation=1), opinion())
+        assert result.classification is sys.intern("Hybrid / Manipulated")
+        assert result.confidence is sys.intern("medium")
+
+    def test_batch_matches_single_calls(self):
+        """Test batch fusion gives the same result as fusing each pair"""
+        pairs = [
+            (signals(ai=5), opinion()),
+            (signals(human=2), opinion("Likely Original", 'high')),
+            (signals(human=4, ai=5), opinion("Likely AI-Generated")),
+            ({}, {}),
+        ]
+        assert fuse_evidence_batch(pairs) == [fuse_evidence(*pair) for pair in pairs]
+        assert fuse_evidence_batch([]) == []
+
+    def test_no_evidence_is_inconclusive(self):
+        """Test empty inputs fall through to Inconclusive"""
+        classification, confidence, reason, indicators = fuse_evidence({}, {})
+        assert (classification, confidence) == ("Inconclusive", 'low')
+        assert reason == "Insufficient evidence for classification (0 indicators detected)"
+        assert indicators == []
+
+    def test_null_sections_treated_as_empty(self):
+        """Test null indicator lists and opinion read as missing"""
+        forensic = {'forensic_indicators': {'human_signals': None, 'ai_signals': None}}
+        assert fuse_evidence(forensic, {'origin': None, 'ai_signals': None}) == fuse_evidence({}, {})
+
+    def test_indicators_are_prefixed_and_opinion_capped(self):
+        """Test the combined indicator list labels each source and keeps 3 opinion signals"""
+        indicators = fuse_evidence(signals(human=1, ai=1, manipulation=1), opinion(ai_signals='abcde'))[3]
+        assert indicators == [
+            "[FORENSIC] human 0", "[FORENSIC AI] ai 0", "[FORENSIC EDIT] edit 0",
+            "[AI OPINION] a", "[AI OPINION] b", "[AI OPINION] c",
+        ]
@@ -0,0 +1,39 @@
+"""
+Unit tests for password hashing
+"""
+import bcrypt
+import pytest
+
+from password_utils import hash_password, verify_password, password_needs_rehash
+
+
+@pytest.mark.unit
+@pytest.mark.security
+class TestPasswordHashing:
+    """Test Argon2id hashing and legacy bcrypt support"""
+
+    def test_hash_is_argon2id(self):
+        """Test new hashes use Argon2id"""
+        assert hash_password("Secret123").startswith("$argon2id$")
+
+    def test_verify_round_trip(self):
+        """Test the right password verifies and a wrong one does not"""
+        hashed = hash_password("Secret123")
+        assert verify_password("Secret123", hashed)
+        assert not verify_password("Secret124", hashed)
+
+    def test_legacy_bcrypt_hash_verifies(self):
+        """Test hashes written by bcrypt still verify"""
+        hashed = bcrypt.hashpw(b"Secret123", bcrypt.gensalt(rounds=4)).decode('utf-8')
+        assert verify_password("Secret123", hashed)
+        assert not verify_password("Secret124", hashed)
+
+    def test_needs_rehash(self):
+        """Test only legacy hashes are flagged for rehashing"""
+        legacy = bcrypt.hashpw(b"Secret123", bcrypt.gensalt(rounds=4)).decode('utf-8')
+        assert password_needs_rehash(legacy)
+        assert not password_needs_rehash(hash_password("Secret123"))
+
+    def test_garbage_hash_rejected(self):
+        """Test malformed stored hashes fail closed"""
+        assert not verify_password("Secret123", "not-a-hash")